@@ -0,0 +1,185 @@
+"""
+Catalog indexes for the University Timetable Generator
+Built once when a catalog is loaded so lookup endpoints do not scan the course table
+"""
+
+import bisect
+import re
+from collections import Counter
+
+
+SEARCH_PAGE_SIZE = 20           # Default page size for /courses/search
+SEARCH_MAX_PAGE_SIZE = 100      # Largest page a client may ask for
+QUERY_PAGE_SIZE = 50            # Default page size for /sections/query
+QUERY_MAX_PAGE_SIZE = 500
+DAY_COUNT = 7
+DAY_MINUTES = 24 * 60
+ALL_DAYS = (1 << DAY_COUNT) - 1
+
+# Tiers of word matches, ranked after code matches
+MATCH_TITLE = 0                 # Every query token found in the title (or code)
+MATCH_INSTRUCTOR = 1            # Some query token only found among the instructors
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def normalize_code(text):
+    """Course code reduced to lowercase letters and digits, so 'cs101' finds 'CS 101' and 'CS|101'"""
+    return ''.join(TOKEN_PATTERN.findall(str(text).lower()))
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower()) if isinstance(text, str) else []
+
+
+class CourseSearchIndex:
+    """Ranked course lookup for /courses/search.
+
+    A prefix trie over normalized course codes answers code lookups, and an
+    inverted index from title and instructor tokens answers word lookups.
+    Each query token also matches longer words it is a prefix of, so results
+    keep up while a user is typing. Courses are numbered by their position in
+    the catalog course list, which is sorted by code; ties rank in that order.
+    """
+
+    def __init__(self, courses, course_sections):
+        self.courses = courses
+        self.codes = [normalize_code(course['code']) for course in courses]
+
+        # Trie nodes are [children, course ids below this prefix, course ids ending here]
+        self.trie = [{}, [], []]
+        for course_id, code in enumerate(self.codes):
+            node = self.trie
+            for character in code:
+                node = node[0].setdefault(character, [{}, [], []])
+                node[1].append(course_id)
+            node[2].append(course_id)
+        # Rank exact codes first once, instead of on every lookup
+        pending = [self.trie]
+        while pending:
+            node = pending.pop()
+            if node[2]:
+                exact = set(node[2])
+                node[1] = node[2] + [course_id for course_id in node[1] if course_id not in exact]
+            pending.extend(node[0].values())
+
+        self.title_postings = {}
+        self.instructor_postings = {}
+        for course_id, course in enumerate(courses):
+            for token in set(tokenize(course['code'])) | set(tokenize(course['title'])):
+                self.title_postings.setdefault(token, []).append(course_id)
+            instructor_tokens = set()
+            for summary in course_sections.get(course['code'], ()):
+                instructor_tokens.update(tokenize(summary['instructor']))
+            for token in instructor_tokens:
+                self.instructor_postings.setdefault(token, []).append(course_id)
+        self.vocabulary = sorted(self.title_postings.keys() | self.instructor_postings.keys())
+
+    def search(self, query, offset=0, limit=SEARCH_PAGE_SIZE):
+        """(total matches, one page of catalog course entries) for a query, best matches first"""
+        ranked = self.rank(query)
+        return len(ranked), [self.courses[course_id] for course_id in ranked[offset:offset + limit]]
+
+    def rank(self, query):
+        """Course ids matching a query: code matches (exact, then prefix), then courses whose
+        title matches every token, then those that also needed an instructor name"""
+        code = normalize_code(query)
+        if not code:
+            return []
+        node = self.trie
+        for character in code:
+            node = node[0].get(character)
+            if node is None:
+                return self._rank_tokens(tokenize(query), set())
+        return node[1] + self._rank_tokens(tokenize(query), set(node[1]))
+
+    def _rank_tokens(self, tokens, excluded):
+        """Token matches not in excluded, ordered by tier, then summed strength, then catalog order"""
+        matched = [self._token_matches(token) for token in tokens]
+        if len(matched) == 1:
+            # Each tier of a single token is already one strength: 3 exact, 2 prefix, 1 instructor
+            return [course_id for tier in matched[0] for course_id in sorted(tier - excluded)]
+
+        candidates = set.intersection(*(exact | prefixed | instructor for exact, prefixed, instructor in matched))
+        candidates -= excluded
+        keys = []
+        for course_id in candidates:
+            strengths = [3 if course_id in exact else 2 if course_id in prefixed else 1
+                         for exact, prefixed, _ in matched]
+            tier = MATCH_TITLE if min(strengths) >= 2 else MATCH_INSTRUCTOR
+            keys.append((tier, -sum(strengths), course_id))
+        keys.sort()
+        return [course_id for _, _, course_id in keys]
+
+    def _token_matches(self, token):
+        """(title word equals token, title word starts with token, only an instructor word does) as id sets"""
+        start = bisect.bisect_left(self.vocabulary, token)
+        end = bisect.bisect_left(self.vocabulary, token + '\x7f')
+        exact = set(self.title_postings.get(token, ()))
+        prefixed = set()
+        instructor = set()
+        for word in self.vocabulary[start:end]:
+            if word != token:
+                prefixed.update(self.title_postings.get(word, ()))
+            instructor.update(self.instructor_postings.get(word, ()))
+        prefixed -= exact
+        instructor -= exact
+        instructor -= prefixed
+        return exact, prefixed, instructor
+
+
+class SectionIntervalIndex:
+    """Sections by meeting time for /sections/query.
+
+    Every meeting of every section is indexed per weekday and sorted by start
+    minute, so a time window on a day is a bisect plus a scan of the meetings
+    that start inside it. Sections are numbered by catalog section id, in the
+    order of section_rows; instructors and rooms are given per section id.
+    """
+
+    def __init__(self, section_rows, instructors, rooms):
+        self.instructors = [str(instructor).lower() for instructor in instructors]
+        self.rooms = [tuple(str(room).lower() for room in section_rooms) for section_rooms in rooms]
+        self.meeting_counts = []
+        self.meetings = [[] for _ in range(DAY_COUNT)]
+        for section_id, rows in enumerate(section_rows.values()):
+            count = 0
+            for days, start, end in rows:
+                for day in days:
+                    self.meetings[day].append((start, end, section_id))
+                    count += 1
+            self.meeting_counts.append(count)
+        for meetings in self.meetings:
+            meetings.sort()
+        self.starts = [[start for start, _, _ in meetings] for meetings in self.meetings]
+        self.scheduled = [section_id for section_id, count in enumerate(self.meeting_counts) if count]
+
+    def query(self, day_mask=ALL_DAYS, window_start=0, window_end=DAY_MINUTES, instructor=None, room=None, fits=False):
+        """Sorted ids of sections with a meeting inside [window_start, window_end] on a day in day_mask.
+        With fits, every meeting of the section has to be on those days and inside the window.
+        instructor and room keep sections whose instructor or one of whose rooms contains the text."""
+        if day_mask == ALL_DAYS and window_start <= 0 and window_end >= DAY_MINUTES:
+            section_ids = self.scheduled  # No time constraint at all
+        else:
+            inside = []
+            for day in range(DAY_COUNT):
+                if not day_mask >> day & 1:
+                    continue
+                first = bisect.bisect_left(self.starts[day], window_start)
+                last = bisect.bisect_left(self.starts[day], window_end)
+                inside += [section_id for _, end, section_id in self.meetings[day][first:last] if end <= window_end]
+            if fits:
+                section_ids = [section_id for section_id, count in Counter(inside).items()
+                               if count == self.meeting_counts[section_id]]
+            else:
+                section_ids = list(set(inside))
+            section_ids.sort()
+
+        if instructor:
+            text = instructor.lower()
+            section_ids = [section_id for section_id in section_ids if text in self.instructors[section_id]]
+        if room:
+            text = room.lower()
+            section_ids = [section_id for section_id in section_ids
+                           if any(text in section_room for section_room in self.rooms[section_id])]
+        return section_ids
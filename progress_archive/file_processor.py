@@ -135,43 +135,33 @@ def process_uploaded_file(df):
 # =================================================================
 
 def score_combinations_by_preferences(combinations, preferences):
-    """Score combinations based on user preferences (AI implementation)"""
-    scored_combinations = []
-    
+    """Score combinations based on user preferences (AI implementation)
+    Every distinct section becomes a feature vector once; the batch is then scored with numpy."""
+    # Imported here so this module still loads on its own, without the app's root on the path
+    from timetable_engine import SectionFeatures, build_section_rows
+
+    section_rows = {}
     for combination in combinations:
-        score = 0
-        
-        # AI-based scoring based on preferences
-        
-        # Time preferences scoring
-        if preferences.get('avoid_early_morning', False):
-            early_classes = check_early_morning_classes(combination)
-            score += (10 - early_classes * 2)  # Penalize early morning classes
-            
-        if preferences.get('avoid_late_evening', False):
-            late_classes = check_late_evening_classes(combination)
-            score += (10 - late_classes * 2)  # Penalize late evening classes
-            
-        # Gap preferences scoring
-        if preferences.get('avoid_long_gaps', False):
-            long_gaps = count_long_gaps(combination)
-            score += (10 - long_gaps * 3)  # Heavily penalize long gaps
-            
-        # Day distribution scoring
-        if preferences.get('minimize_commute', False):
-            unique_days = count_unique_days(combination)
-            score += (15 - unique_days * 2)  # Favor fewer days on campus
-            
-        # Lunch break scoring
-        if preferences.get('lunch_break', False):
-            has_lunch_conflict = check_lunch_conflicts(combination)
-            score += 0 if has_lunch_conflict else 5  # Bonus for preserving lunch
-            
-        scored_combinations.append({
+        for course_code, section, section_data in combination:
+            key = (course_code, section)
+            if key not in section_rows:
+                section_rows[key] = build_section_rows(section_data).get(key, ())
+
+    features = SectionFeatures(section_rows)
+    batch = features.batch([
+        features.ids((course_code, section) for course_code, section, _ in combination)
+        for combination in combinations
+    ])
+    scores = features.score(batch, preferences)
+
+    scored_combinations = [
+        {
             'combination': combination,
-            'score': max(score, 0),  # Ensure non-negative scores
+            'score': int(score),
             'details': get_combination_details(combination)
-        })
+        }
+        for combination, score in zip(combinations, scores)
+    ]
     
     # Sort by score (highest first)
     return sorted(scored_combinations, key=lambda x: x['score'], reverse=True)
@@ -0,0 +1,204 @@
+"""
+Session management for the University Timetable Generator
+Keeps per-session generators within a session count and memory budget
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+SIZE_SAMPLE = 32                # Containers longer than this are estimated from an even sample
+
+# Reasons a whole session was evicted, as reported by /sessions/metrics
+EVICT_IDLE = "idle"             # Not used for longer than the idle timeout
+EVICT_COUNT = "count"           # Least recently used once the session limit was reached
+EVICT_MEMORY = "memory"         # Least recently used while over the byte budget with no results left to drop
+
+
+def estimate_size(*objects, shared=()):
+    """Approximate bytes held by objects and everything they reference, except what is
+    reachable through shared only by identity (such as a catalog measured on its own).
+    Long lists, dicts and object columns are sized from a sample, so catalogs of any
+    size are measured in milliseconds; objects referenced more than once count once."""
+    seen = {id(obj) for obj in shared}
+    return sum(_estimate(obj, seen) for obj in objects)
+
+
+def _estimate(obj, seen):
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        size = sys.getsizeof(obj) if obj.base is None else obj.nbytes
+        if obj.dtype == object:
+            size += _estimate_items(obj.ravel().tolist(), seen)
+        return size
+    if isinstance(obj, pd.DataFrame):
+        # Column dtypes instead of memory_usage(), which costs more than the rest for small slices
+        size = obj.index.nbytes
+        for position, dtype in enumerate(obj.dtypes):
+            size += getattr(dtype, 'itemsize', 8) * len(obj)
+            if dtype.kind == 'O':  # Python objects, including pandas string columns
+                size += _estimate_items(obj.iloc[:, position].tolist(), seen)
+        return size
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += _estimate_items(list(obj.keys()), seen) + _estimate_items(list(obj.values()), seen)
+    elif isinstance(obj, (list, tuple)):
+        size += _estimate_items(obj, seen)
+    elif isinstance(obj, (set, frozenset)):
+        size += _estimate_items(list(obj), seen)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += _estimate(vars(obj), seen)
+    return size
+
+
+def _estimate_items(items, seen):
+    count = len(items)
+    if count <= SIZE_SAMPLE:
+        return sum(_estimate(item, seen) for item in items)
+    sample = items[::count // SIZE_SAMPLE]
+    return sum(_estimate(item, seen) for item in sample) * count // len(sample)
+
+
+class SessionStore:
+    """Per-session generators with idle expiry, a session limit and a byte budget.
+
+    Sessions are kept in least recently used order. Every lookup first expires
+    sessions idle past the timeout, then evicts the least recently used ones
+    beyond the session limit. While the measured total is over the byte budget,
+    the least recently used sessions first lose their results, which can be
+    generated again, and only then are evicted outright. The session being
+    served is never dropped to make room.
+
+    Sessions report their size through memory_footprint(), returning
+    (bytes kept, bytes release_results() would free, shared) where shared is
+    (key, bytes) for memory several sessions refer to, such as a catalog, or
+    None. Shared memory counts once while any session refers to it. A session
+    is measured again on the lookup after it was used, once the request that
+    used it has had the chance to change it.
+    """
+
+    def __init__(self, factory, max_sessions, max_bytes, idle_seconds, clock=time.monotonic):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self.sessions = OrderedDict()   # Session id -> [session, last used, bytes kept, releasable bytes, shared key]
+        self.shared = {}                # Shared key -> [bytes, sessions referring to it]
+        self.total_bytes = 0
+        self.unmeasured = set()         # Sessions handed out since they were last measured
+        self.evictions = {EVICT_IDLE: 0, EVICT_COUNT: 0, EVICT_MEMORY: 0}
+        self.results_released = 0
+        self.released_bytes = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self.sessions
+
+    def get(self, session_id):
+        """The session for an id, created if missing, after bringing the store back within its limits"""
+        with self.lock:
+            now = self.clock()
+            self._expire(now)
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                entry = self.sessions[session_id] = [self.factory(), now, 0, 0, None]
+            else:
+                self.sessions.move_to_end(session_id)
+                entry[1] = now
+            self.unmeasured.add(session_id)
+            for measured_id in self.unmeasured:
+                if measured_id in self.sessions:
+                    self._measure(self.sessions[measured_id])
+            self.unmeasured = {session_id}
+            self._enforce_count()
+            self._enforce_budget(session_id)
+            return entry[0]
+
+    def stats(self):
+        """Store size, limits and eviction counters"""
+        with self.lock:
+            return {
+                "sessions": len(self.sessions),
+                "max_sessions": self.max_sessions,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "releasable_bytes": sum(entry[3] for entry in self.sessions.values()),
+                "shared": len(self.shared),
+                "shared_bytes": sum(size for size, _ in self.shared.values()),
+                "idle_seconds": self.idle_seconds,
+                "evictions": dict(self.evictions),
+                "results_released": self.results_released,
+                "released_bytes": self.released_bytes,
+            }
+
+    def _measure(self, entry):
+        kept, releasable, shared = entry[0].memory_footprint()
+        self.total_bytes += kept + releasable - entry[2] - entry[3]
+        entry[2], entry[3] = kept, releasable
+        key, size = shared or (None, 0)
+        if entry[4] != key:
+            self._unshare(entry)
+            if key is not None:
+                self.shared.setdefault(key, [0, 0])[1] += 1
+                entry[4] = key
+        if key is not None:
+            usage = self.shared[key]
+            self.total_bytes += size - usage[0]
+            usage[0] = size
+
+    def _unshare(self, entry):
+        if entry[4] is None:
+            return
+        usage = self.shared[entry[4]]
+        usage[1] -= 1
+        if not usage[1]:
+            self.total_bytes -= usage[0]
+            del self.shared[entry[4]]
+        entry[4] = None
+
+    def _evict(self, session_id, reason):
+        entry = self.sessions.pop(session_id)
+        self.total_bytes -= entry[2] + entry[3]
+        self._unshare(entry)
+        self.evictions[reason] += 1
+        print(f"🧹 Evicted session {session_id[:8]} ({reason}, {(entry[2] + entry[3]) // 1024} KB)")
+
+    def _expire(self, now):
+        # Oldest first, so stop at the first session still in use
+        while self.sessions:
+            session_id, entry = next(iter(self.sessions.items()))
+            if now - entry[1] <= self.idle_seconds:
+                break
+            self._evict(session_id, EVICT_IDLE)
+
+    def _enforce_count(self):
+        # The session being served was just moved to the end, so it is never the oldest
+        while len(self.sessions) > self.max_sessions:
+            self._evict(next(iter(self.sessions)), EVICT_COUNT)
+
+    def _enforce_budget(self, current_id):
+        if self.total_bytes <= self.max_bytes:
+            return
+        for session_id, entry in self.sessions.items():
+            if self.total_bytes <= self.max_bytes:
+                return
+            if session_id == current_id or not entry[3]:
+                continue
+            released = entry[3]
+            entry[0].release_results()
+            self._measure(entry)
+            self.results_released += 1
+            self.released_bytes += released - entry[3]
+        while self.total_bytes > self.max_bytes and len(self.sessions) > 1:
+            self._evict(next(iter(self.sessions)), EVICT_MEMORY)
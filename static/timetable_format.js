@@ -0,0 +1,35 @@
+// Rebuild full timetables from a format=compact response (shared sections table + section id arrays)
+function expandTimetables(result) {
+  if (result.format !== "compact") {
+    return result.timetables;
+  }
+  return result.timetables.map((sectionIds, index) => {
+    const alternatives = (result.alternatives && result.alternatives[index]) || {};
+    const schedule = {};
+    result.days.forEach((day) => (schedule[day] = []));
+
+    const courses = sectionIds.map((sectionId) => {
+      const { meetings, ...entry } = result.sections[sectionId];
+      const equivalentSections = alternatives[sectionId];
+      const course = equivalentSections
+        ? { ...entry, section: equivalentSections.join("/"), equivalent_sections: equivalentSections }
+        : entry;
+      meetings.forEach(([day, slotIndex]) => {
+        const slot = course.time_slots[slotIndex];
+        schedule[day].push({
+          course: course.course_code,
+          section: course.section,
+          title: course.title,
+          instructor: course.instructor,
+          room: slot.location,
+          start: slot.start_time,
+          end: slot.end_time,
+          time: `${slot.start_time} - ${slot.end_time}`,
+        });
+      });
+      return course;
+    });
+
+    return { courses, total_courses: courses.length, schedule };
+  });
+}
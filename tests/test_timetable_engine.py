@@ -0,0 +1,220 @@
+"""
+Cross-checks of the timetable engine against brute-force enumeration on small synthetic catalogs
+"""
+
+import itertools
+import random
+
+import pytest
+
+from session_manager import EVICT_COUNT, EVICT_IDLE, EVICT_MEMORY, SessionStore
+from timetable_engine import SearchSpace, SectionFeatures, pareto_solutions, plan_search, run_plan
+
+
+SEEDS = range(15)
+LIMITS = {"max_days": 3, "max_daily_minutes": 240}
+
+
+def make_catalog(seed):
+    """Random course options with one "choose 2" elective group on odd seeds, plus travel-time pairs"""
+    rng = random.Random(seed)
+    section_rows = {}
+    course_options = []
+    group_picks = []
+    for course_index in range(rng.randint(3, 4)):
+        course_code = f"CS {101 + course_index}"
+        units = []
+        for section_index in range(rng.randint(2, 4)):
+            key = (course_code, f"L{section_index + 1}")
+            rows = []
+            for _ in range(rng.choice([1, 1, 2])):
+                days = tuple(sorted(rng.sample(range(5), rng.randint(1, 2))))
+                start = rng.randrange(8 * 60, 17 * 60, 30)
+                rows.append((days, start, start + rng.choice([50, 80])))
+            section_rows[key] = tuple(rows)
+            units.append([key])
+        course_options.append(units)
+        group_picks.append(1)
+    if seed % 2:
+        electives = []
+        for course_index in range(4):
+            key = (f"HUM {201 + course_index}", "L1")
+            start = rng.randrange(8 * 60, 17 * 60, 30)
+            section_rows[key] = (((rng.randrange(5),), start, start + 80),)
+            electives.append([key])
+        course_options.append(electives)
+        group_picks.append(2)
+    keys = sorted(section_rows)
+    too_close = frozenset(tuple(sorted(rng.sample(keys, 2))) for _ in range(3))
+    return course_options, group_picks, section_rows, too_close
+
+
+def build_space(seed, limits=None):
+    course_options, group_picks, section_rows, too_close = make_catalog(seed)
+    space = SearchSpace(course_options, section_rows, lambda *keys: True, group_picks, too_close,
+                        SectionFeatures(section_rows))
+    if limits:
+        space = space.limited(**limits)
+    return space, section_rows
+
+
+def brute_force(seed, limits=None):
+    """Every valid timetable as a frozenset of section keys, by itertools.product over the groups"""
+    course_options, group_picks, section_rows, too_close = make_catalog(seed)
+    choices = [list(itertools.combinations(units, picks)) for units, picks in zip(course_options, group_picks)]
+    found = set()
+    for picked in itertools.product(*choices):
+        keys = [key for units in picked for unit in units for key in unit]
+        if any(clash(key1, key2, section_rows, too_close) for key1, key2 in itertools.combinations(keys, 2)):
+            continue
+        if limits and not within(keys, section_rows, limits):
+            continue
+        found.add(frozenset(keys))
+    return found
+
+
+def clash(key1, key2, section_rows, too_close):
+    if tuple(sorted((key1, key2))) in too_close:
+        return True
+    return any(set(days1) & set(days2) and start1 < end2 and start2 < end1
+               for days1, start1, end1 in section_rows[key1] for days2, start2, end2 in section_rows[key2])
+
+
+def within(keys, section_rows, limits):
+    minutes = {}
+    for key in keys:
+        for days, start, end in section_rows[key]:
+            for day in days:
+                minutes[day] = minutes.get(day, 0) + end - start
+    return len(minutes) <= limits["max_days"] and max(minutes.values(), default=0) <= limits["max_daily_minutes"]
+
+
+def objectives(keys, section_rows):
+    """Pareto objectives: days on campus, idle minutes, negated earliest start, latest end"""
+    by_day = {}
+    for key in keys:
+        for days, start, end in section_rows[key]:
+            for day in days:
+                by_day.setdefault(day, []).append((start, end))
+    idle = sum(max(intervals[i + 1][0] - intervals[i][1], 0)
+               for intervals in map(sorted, by_day.values()) for i in range(len(intervals) - 1))
+    rows = [row for key in keys for row in section_rows[key]]
+    return len(by_day), idle, -min(start for _, start, _ in rows), max(end for _, _, end in rows)
+
+
+def found_by(space, strategy, max_results=10 ** 6, **kwargs):
+    plan = plan_search(space, max_results=max_results, strategy=strategy)
+    solutions = run_plan(space, plan, max_results, **kwargs)
+    return [frozenset(space.solution_sections(solution)) for solution in solutions], plan
+
+
+@pytest.mark.parametrize("limits", [None, LIMITS])
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("strategy", ["exhaustive", "block"])
+def test_complete_strategies_match_enumeration(seed, limits, strategy):
+    space, _ = build_space(seed, limits)
+    expected = brute_force(seed, limits)
+    found, _ = found_by(space, strategy)
+    assert len(found) == len(set(found))
+    assert set(found) == expected
+
+
+@pytest.mark.parametrize("limits", [None, LIMITS])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sample_counts_and_draws_valid_timetables(seed, limits):
+    space, _ = build_space(seed, limits)
+    expected = brute_force(seed, limits)
+    found, plan = found_by(space, "sample", max_results=5, seed=seed)
+    if plan["strategy"] == "infeasible":
+        assert not expected and not found
+        return
+    assert plan["count_exact"] and plan["counted_solutions"] == len(expected)
+    assert len(found) == len(set(found)) == min(5, len(expected))
+    assert set(found) <= expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_diverse_returns_distinct_valid_timetables(seed):
+    space, _ = build_space(seed)
+    expected = brute_force(seed)
+    found, _ = found_by(space, "diverse", max_results=5, seed=seed)
+    assert len(found) == len(set(found)) == min(5, len(expected))
+    assert set(found) <= expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_top_k_keeps_the_best_scores(seed):
+    preferences = {"avoid_early_morning": True, "minimize_commute": True}
+    space, _ = build_space(seed)
+    expected = brute_force(seed)
+    plan = plan_search(space, preferences, max_results=3)
+    solutions = run_plan(space, plan, 3, preferences=preferences)
+    features = space.features
+
+    def scores(section_lists):
+        batch = features.batch([features.ids(sections) for sections in section_lists])
+        return sorted(features.score(batch, preferences).tolist(), reverse=True)
+
+    found = [space.solution_sections(solution) for solution in solutions]
+    assert {frozenset(sections) for sections in found} <= expected
+    assert scores(found) == scores([sorted(keys) for keys in expected])[:3]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_pareto_matches_the_true_front(seed):
+    space, section_rows = build_space(seed)
+    expected = brute_force(seed)
+    vectors = {objectives(keys, section_rows) for keys in expected}
+    front = {vector for vector in vectors
+             if not any(other != vector and all(a <= b for a, b in zip(other, vector)) for other in vectors)}
+    plan = plan_search(space, strategy="pareto")
+    solutions = pareto_solutions(space, plan, 10 ** 6)
+    found = [objectives(space.solution_sections(solution), section_rows) for solution in solutions]
+    assert plan["pareto_complete"]
+    assert sorted(found) == sorted(front)
+
+
+class FakeSession:
+    """Session with a fixed kept size and results that can be released"""
+
+    def __init__(self, kept=100, results=0):
+        self.kept = kept
+        self.results = results
+
+    def memory_footprint(self):
+        return self.kept, self.results, None
+
+    def release_results(self):
+        self.results = 0
+
+
+def test_session_store_expires_releases_and_evicts():
+    now = [0.0]
+    store = SessionStore(FakeSession, max_sessions=3, max_bytes=1000, idle_seconds=60, clock=lambda: now[0])
+
+    store.get("a").results = 200
+    store.get("b").results = 200
+    store.get("c")
+    assert store.stats()["bytes"] == 700
+
+    # Over the session limit: the least recently used session goes
+    store.get("d")
+    assert list(store.sessions) == ["b", "c", "d"]
+    assert store.stats()["evictions"][EVICT_COUNT] == 1 and store.stats()["bytes"] == 500
+
+    # Over the byte budget: older sessions lose their results before anything is evicted
+    store.get("c").results = 600
+    store.get("d")
+    assert store.sessions["b"][0].results == 0
+    assert store.stats()["results_released"] == 1 and store.stats()["bytes"] == 900
+
+    # Still over budget with no results left to drop: evict the least recently used
+    store.get("d").kept = 900
+    store.get("d")
+    assert list(store.sessions) == ["c", "d"] and store.sessions["c"][0].results == 0
+    assert store.stats()["evictions"][EVICT_MEMORY] == 1 and store.stats()["bytes"] == 1000
+
+    now[0] += 61
+    store.get("e")
+    assert list(store.sessions) == ["e"]
+    assert store.stats()["evictions"][EVICT_IDLE] == 2 and store.stats()["bytes"] == 100
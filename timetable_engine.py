@@ -0,0 +1,1453 @@
+"""
+Search engine for the University Timetable Generator
+Compiles a course selection into conflict bitsets and plans how to search it
+"""
+
+import bisect
+import copy
+import itertools
+import math
+import random
+import re
+import time as time_module
+from datetime import time
+
+import numpy as np
+
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_INDEX = {day: index for index, day in enumerate(DAY_NAMES)}
+
+# Planner thresholds
+EXHAUSTIVE_LIMIT = 200_000      # Pruned product size we are happy to walk completely
+COUNT_LIMIT = 1_000_000         # Stop exact counting beyond this many solutions
+COUNT_TIME_SHARE = 0.2          # Fraction of the time budget spent counting in sample mode
+ESTIMATE_PROBES = 64            # Random probes for Knuth's tree-size estimate
+DEFAULT_SEED = 0                # Sampling is reproducible unless a seed is given
+DIVERSE_POOL_FACTOR = 4         # Candidates gathered per requested timetable in diverse mode
+DIVERSE_TIME_BUDGET = 5.0       # Seconds spent gathering candidates in diverse mode
+START_BUCKET_MINUTES = 15       # Resolution of the start-time signature used for diversity
+CORE_TIME_BUDGET = 5.0          # Seconds spent shrinking a conflict core
+MAX_CORE_CONFLICTS = 50         # Conflicting section pairs reported for a core
+MAX_REPAIR_EDITS = 2            # Largest edit set tried when repairing an infeasible selection
+MAX_REPAIR_FRONTIER = 40        # Unrepaired edit sets carried into the next repair depth
+SCORE_BATCH_SIZE = 4096         # Timetables scored per numpy batch in top-k mode
+BLOCK_SIZE = 1 << 16            # Candidate index tuples validated per numpy block
+BLOCK_MIN_YIELD = 0.05          # Valid share of the pruned product above which blocks beat backtracking
+
+STRATEGIES = ('exhaustive', 'sample', 'diverse', 'top_k', 'pareto', 'block')
+PREFERENCES = ('avoid_early_morning', 'avoid_late_evening', 'avoid_long_gaps', 'minimize_commute', 'lunch_break')
+
+
+class SearchTimeout(Exception):
+    """Raised internally when a search runs past its deadline"""
+
+
+def to_minutes(value):
+    """Convert a datetime.time to minutes since midnight (None for missing times)"""
+    if not isinstance(value, time):
+        return None
+    return value.hour * 60 + value.minute
+
+
+def iter_bits(mask):
+    """Yield the indices of the set bits of an integer bitset, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def build_section_rows(course_data):
+    """Index the meeting rows of every section as (day indices, start minute, end minute)"""
+    section_rows = {}
+    columns = zip(course_data['Course Code'], course_data['Section'], course_data['Days_List'],
+                  course_data['Start_24h'], course_data['End_24h'])
+    for course_code, section, days_list, start, end in columns:
+        rows = section_rows.setdefault((course_code, section), [])
+        start_min, end_min = to_minutes(start), to_minutes(end)
+        if start_min is None or end_min is None:
+            continue  # Same rule as the DataFrame conflict check: skip invalid times
+        days = tuple(sorted(DAY_INDEX[day] for day in days_list if day in DAY_INDEX))
+        rows.append((days, start_min, end_min))
+    return {key: tuple(rows) for key, rows in section_rows.items()}
+
+
+def building_of(room):
+    """Building prefix of a room ("NAC 512" -> "NAC", "A201" -> "A"), None when there is none"""
+    match = re.match(r'^\s*([A-Za-z]+)', str(room))
+    return match.group(1).upper() if match else None
+
+
+def build_too_close(course_data, travel_minutes):
+    """Find section pairs whose meetings follow each other too closely to get between buildings.
+
+    travel_minutes maps (building, building) to minutes. Meetings are indexed per
+    day by start time, so only the meetings starting within the longest travel
+    time after each one are looked at. Returns a frozenset of
+    ((course_code, section), (course_code, section)) keys, smaller key first.
+    """
+    if not travel_minutes or 'Room' not in course_data.columns:
+        return frozenset()
+    longest = max(travel_minutes.values())
+    meetings_by_day = {}
+    columns = zip(course_data['Course Code'], course_data['Section'], course_data['Days_List'],
+                  course_data['Start_24h'], course_data['End_24h'], course_data['Room'])
+    for course_code, section, days_list, start, end, room in columns:
+        start_min, end_min = to_minutes(start), to_minutes(end)
+        building = building_of(room)
+        if start_min is None or end_min is None or building is None:
+            continue
+        for day in days_list:
+            if day in DAY_INDEX:
+                meetings_by_day.setdefault(DAY_INDEX[day], []).append((start_min, end_min, building, (course_code, section)))
+
+    too_close = set()
+    for meetings in meetings_by_day.values():
+        meetings.sort()
+        starts = [meeting[0] for meeting in meetings]
+        for _, end, building, key in meetings:
+            following = meetings[bisect.bisect_left(starts, end):bisect.bisect_left(starts, end + longest)]
+            for next_start, _, next_building, next_key in following:
+                if next_key == key or next_building == building:
+                    continue
+                if next_start - end < travel_minutes.get((building, next_building), 0):
+                    too_close.add((key, next_key) if key <= next_key else (next_key, key))
+    return frozenset(too_close)
+
+
+def _day_intervals(rows):
+    """Expand meeting rows into {day index: [(start, end), ...]}"""
+    by_day = {}
+    for days, start, end in rows:
+        for day in days:
+            by_day.setdefault(day, []).append((start, end))
+    return by_day
+
+
+def _intervals_overlap(by_day1, by_day2):
+    """Check two per-day interval maps for any overlapping meeting"""
+    for day, intervals1 in by_day1.items():
+        intervals2 = by_day2.get(day)
+        if not intervals2:
+            continue
+        for start1, end1 in intervals1:
+            for start2, end2 in intervals2:
+                if start1 < end2 and start2 < end1:
+                    return True
+    return False
+
+
+def rows_overlap(rows1, rows2):
+    """Check two sets of meeting rows for a meeting overlap on any day"""
+    return _intervals_overlap(_day_intervals(rows1), _day_intervals(rows2))
+
+
+def rows_within_limits(rows, max_days=None, earliest_start=None, latest_end=None, max_daily_minutes=None):
+    """Check the meeting rows of a whole timetable against the hard limits of SearchSpace.limited"""
+    for days, start, end in rows:
+        if days and ((earliest_start is not None and start < earliest_start)
+                     or (latest_end is not None and end > latest_end)):
+            return False
+    day_mask, minutes = _rows_load(rows)
+    if max_days is not None and day_mask.bit_count() > max_days:
+        return False
+    return max_daily_minutes is None or max(minutes) <= max_daily_minutes
+
+
+def _rows_load(rows):
+    """Day bitmask and contact minutes per day of a set of meeting rows"""
+    day_mask = 0
+    minutes = [0] * len(DAY_NAMES)
+    for days, start, end in rows:
+        for day in days:
+            day_mask |= 1 << day
+            minutes[day] += end - start
+    return day_mask, tuple(minutes)
+
+
+def _add_load(load, unit_load):
+    day_mask, minutes = load
+    unit_days, unit_minutes = unit_load
+    if not unit_days:
+        return load
+    return day_mask | unit_days, tuple(a + b for a, b in zip(minutes, unit_minutes))
+
+
+class SearchSpace:
+    """A selection compiled into per-group domains and pairwise compatibility bitsets.
+
+    Every atomic unit (a section, or a section together with its paired sections)
+    gets a global id. ``compat[uid]`` has a bit set for every unit that can appear
+    in the same timetable, so a partial timetable is described by a single
+    ``allowed`` mask: the AND of the compat masks of the units chosen so far.
+    Groups pick one unit each, except "choose k of n" elective groups which pick
+    ``group_picks[g]`` mutually compatible units.
+    """
+
+    def __init__(self, course_options, section_rows, sections_compatible, group_picks=None, too_close=frozenset(),
+                 features=None):
+        self.course_options = course_options
+        self.group_count = len(course_options)
+        self.group_picks = list(group_picks or [1] * self.group_count)  # units chosen per group
+        self.units = []            # uid -> (group index, option index)
+        self.unit_sections = []    # uid -> tuple of (course_code, section)
+        self.unit_rows = []        # uid -> tuple of meeting rows
+        self.group_units = []      # group index -> list of uids (before pruning)
+        self.raw_sizes = [len(options) for options in course_options]
+
+        for group_index, options in enumerate(course_options):
+            uids = []
+            for option_index, unit in enumerate(options):
+                uid = len(self.units)
+                sections = tuple((entry[0], entry[1]) for entry in unit)
+                self.units.append((group_index, option_index))
+                self.unit_sections.append(sections)
+                self.unit_rows.append(tuple(row for key in sections for row in section_rows.get(key, ())))
+                uids.append(uid)
+            self.group_units.append(uids)
+
+        self._section_rows = section_rows
+        self._sections_compatible = sections_compatible
+        self._too_close = too_close  # Section pairs without enough time to change buildings
+        self.features = features   # SectionFeatures of the catalog, built on demand when missing
+        self.limits = None         # (max days, max daily minutes) once limited() is applied
+        self._empty_load = None    # Load of an empty timetable, None without limits
+        self._section_days = {}
+        self._clash_cache = {}
+        self._build_compat()
+        self._build_classes()
+        self._prune_domains()
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def _section_by_day(self, key):
+        by_day = self._section_days.get(key)
+        if by_day is None:
+            by_day = _day_intervals(self._section_rows.get(key, ()))
+            self._section_days[key] = by_day
+        return by_day
+
+    def clash_reason(self, key1, key2):
+        """Why two sections cannot be taken together (None when they can)"""
+        (course1, section1), (course2, section2) = key1, key2
+        if course1 == course2:
+            return 'same course'
+        if _intervals_overlap(self._section_by_day(key1), self._section_by_day(key2)):
+            return 'time overlap'
+        if ((key1, key2) if key1 <= key2 else (key2, key1)) in self._too_close:
+            return 'travel time'
+        if not self._sections_compatible(course1, section1, course2, section2):
+            return 'section pairing'
+        return None
+
+    def _sections_clash(self, key1, key2):
+        """Pairwise rule behind _is_valid_combination_optimized: duplicate course, overlap or bad pairing"""
+        cache_key = (key1, key2) if key1 <= key2 else (key2, key1)
+        clash = self._clash_cache.get(cache_key)
+        if clash is None:
+            (course1, section1), (course2, section2) = key1, key2
+            clash = (
+                course1 == course2
+                or _intervals_overlap(self._section_by_day(key1), self._section_by_day(key2))
+                or cache_key in self._too_close
+                or not self._sections_compatible(course1, section1, course2, section2)
+            )
+            self._clash_cache[cache_key] = clash
+        return clash
+
+    def _units_clash(self, uid1, uid2):
+        for key1 in self.unit_sections[uid1]:
+            for key2 in self.unit_sections[uid2]:
+                if self._sections_clash(key1, key2):
+                    return True
+        return False
+
+    def units_clear_of(self, blocks):
+        """Bitset of units that meet outside every blocked (day indices, start, end) window"""
+        blocked = _day_intervals(blocks)
+        mask = 0
+        for uid, rows in enumerate(self.unit_rows):
+            if not _intervals_overlap(_day_intervals(rows), blocked):
+                mask |= 1 << uid
+        return mask
+
+    def _unit_is_valid(self, uid):
+        sections = self.unit_sections[uid]
+        for i in range(len(sections)):
+            for j in range(i + 1, len(sections)):
+                if self._sections_clash(sections[i], sections[j]):
+                    return False
+        return True
+
+    def _build_compat(self):
+        unit_count = len(self.units)
+        self.compat = [0] * unit_count
+        self.valid_mask = 0
+        for uid in range(unit_count):
+            if self._unit_is_valid(uid):
+                self.valid_mask |= 1 << uid
+
+        conflicting_pairs = 0
+        cross_pairs = 0
+        valid_uids = list(iter_bits(self.valid_mask))
+        for i, uid1 in enumerate(valid_uids):
+            group1 = self.units[uid1][0]
+            for uid2 in valid_uids[i + 1:]:
+                same_group = self.units[uid2][0] == group1
+                if self._units_clash(uid1, uid2):
+                    if not same_group:
+                        conflicting_pairs += 1
+                else:
+                    self.compat[uid1] |= 1 << uid2
+                    self.compat[uid2] |= 1 << uid1
+                if not same_group:
+                    cross_pairs += 1
+
+        # Density only counts pairs from different groups, the ones the search can combine
+        self.conflict_density = conflicting_pairs / cross_pairs if cross_pairs else 0.0
+
+    def _build_classes(self):
+        """Collapse units of a group that meet at identical times and clash with the same units.
+
+        Such units (e.g. sections of a large course that differ only by instructor
+        or room) are interchangeable in every timetable, so the search only visits
+        one representative per class and expands the members at output time.
+        """
+        self.class_members = {}    # representative uid -> all uids of its class
+        self.class_of = {}         # uid -> representative uid
+        self.class_size = [1] * len(self.units)
+        self.rep_mask = 0
+        representatives = {}
+        for uid in iter_bits(self.valid_mask):
+            signature = (
+                self.units[uid][0],
+                tuple(course_code for course_code, _ in self.unit_sections[uid]),
+                tuple(sorted(self.unit_rows[uid])),
+                self.compat[uid],
+            )
+            representative = representatives.setdefault(signature, uid)
+            self.class_members.setdefault(representative, []).append(uid)
+            self.class_of[uid] = representative
+            if representative == uid:
+                self.rep_mask |= 1 << uid
+        for representative, members in self.class_members.items():
+            self.class_size[representative] = len(members)
+        self.has_classes = len(self.class_members) < self.valid_mask.bit_count()
+
+    def _prune_domains(self):
+        """Remove units that cannot be completed against some group (arc consistency)"""
+        self.group_masks = []
+        for uids in self.group_units:
+            mask = 0
+            for uid in uids:
+                mask |= 1 << uid
+            self.group_masks.append(mask & self.rep_mask)
+
+        changed = True
+        while changed:
+            changed = False
+            for group_index, mask in enumerate(self.group_masks):
+                for uid in iter_bits(mask):
+                    # A group picking k units needs k compatible partners, or k - 1 in the unit's own group
+                    supported = all(
+                        (self.compat[uid] & other_mask).bit_count()
+                        >= self.group_picks[other_index] - (other_index == group_index)
+                        for other_index, other_mask in enumerate(self.group_masks)
+                    )
+                    if not supported:
+                        mask &= ~(1 << uid)
+                        changed = True
+                self.group_masks[group_index] = mask
+
+        self.alive_mask = 0
+        for mask in self.group_masks:
+            self.alive_mask |= mask
+        self.pruned_sizes = [mask.bit_count() for mask in self.group_masks]
+
+    def product(self, sizes):
+        """Number of candidate timetables for the given domain sizes (k-subsets for pick-k groups)"""
+        if not sizes:
+            return 0
+        return math.prod(math.comb(size, picks) for size, picks in zip(sizes, self.group_picks))
+
+    def member_shortfalls(self):
+        """(group index, picks, members left) for pick-k groups with fewer distinct courses left than picks.
+        Sections of one course clash with each other, so the k-subset product can miss these."""
+        shortfalls = []
+        for group_index, (mask, picks) in enumerate(zip(self.group_masks, self.group_picks)):
+            if picks > 1:
+                members = {self.unit_sections[uid][0][0] for uid in iter_bits(mask)}
+                if len(members) < picks:
+                    shortfalls.append((group_index, picks, len(members)))
+        return shortfalls
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def _start_state(self):
+        """Picks left per group, last uid picked per group and the picks so far"""
+        remaining = {group_index: picks for group_index, picks in enumerate(self.group_picks) if picks}
+        return remaining, [-1] * self.group_count, [[] for _ in range(self.group_count)]
+
+    def _is_dead(self):
+        return not self.group_count or any(
+            mask.bit_count() < picks for mask, picks in zip(self.group_masks, self.group_picks)
+        )
+
+    def _candidates(self, allowed, group_index, last_uid):
+        candidates = allowed & self.group_masks[group_index]
+        if last_uid >= 0:
+            # Pick-k groups choose uids in increasing order so every subset is visited once
+            candidates &= ~((2 << last_uid) - 1)
+        return candidates
+
+    def _most_constrained(self, allowed, remaining, last):
+        """Pick the remaining group with the fewest candidates (None on a dead end)"""
+        best_group, best_candidates, best_count = None, 0, None
+        for group_index, picks_left in remaining.items():
+            candidates = self._candidates(allowed, group_index, last[group_index])
+            count = candidates.bit_count()
+            if count < picks_left:
+                return None, 0
+            if best_count is None or count < best_count:
+                best_group, best_candidates, best_count = group_index, candidates, count
+        return best_group, best_candidates
+
+    def iter_solutions(self, deadline=None, rng=None):
+        """Yield solutions as tuples of uids in group order (randomized order if rng is given)"""
+        if self._is_dead():
+            return
+        remaining, last, chosen = self._start_state()
+        yield from self._search(self.alive_mask, self._empty_load, remaining, last, chosen, deadline, rng)
+
+    def _search(self, allowed, load, remaining, last, chosen, deadline, rng):
+        if not remaining:
+            yield tuple(uid for picks in chosen for uid in picks)
+            return
+        if deadline is not None and time_module.time() > deadline:
+            raise SearchTimeout()
+        group_index, candidates = self._most_constrained(allowed, remaining, last)
+        if group_index is None:
+            return
+        uids = list(iter_bits(candidates))
+        if rng is not None:
+            rng.shuffle(uids)
+        picks_left = remaining.pop(group_index)
+        if picks_left > 1:
+            remaining[group_index] = picks_left - 1
+        previous = last[group_index]
+        for uid in uids:
+            last[group_index] = uid
+            chosen[group_index].append(uid)
+            next_allowed, next_load = self._advance(allowed, load, uid)
+            yield from self._search(next_allowed, next_load, remaining, last, chosen, deadline, rng)
+            chosen[group_index].pop()
+        last[group_index] = previous
+        remaining[group_index] = picks_left
+
+    def _has_solution(self, allowed, load, remaining, deadline=None):
+        """Check whether the given groups can still be filled from the allowed units"""
+        _, last, chosen = self._start_state()
+        search = self._search(allowed, load, dict(remaining), last, chosen, deadline, None)
+        return next(search, None) is not None
+
+    def count_solutions(self, limit=None, deadline=None):
+        """Count solutions, stopping at limit or deadline; returns (count, exact)"""
+        if self._is_dead():
+            return 0, True
+        counter = [0]
+        remaining, last, _ = self._start_state()
+        try:
+            self._count(self.alive_mask, self._empty_load, remaining, last, counter, limit, deadline, 1)
+        except SearchTimeout:
+            return counter[0], False
+        if limit is not None and counter[0] >= limit:
+            return counter[0], False
+        return counter[0], True
+
+    def _weight(self, mask):
+        """Number of concrete units behind a mask of class representatives"""
+        if not self.has_classes:
+            return mask.bit_count()
+        return sum(self.class_size[uid] for uid in iter_bits(mask))
+
+    def _count(self, allowed, load, remaining, last, counter, limit, deadline, weight):
+        if deadline is not None and time_module.time() > deadline:
+            raise SearchTimeout()
+        if len(remaining) == 1:
+            ((group_index, picks_left),) = remaining.items()
+            if picks_left == 1:
+                counter[0] += weight * self._weight(self._candidates(allowed, group_index, last[group_index]))
+                return
+        group_index, candidates = self._most_constrained(allowed, remaining, last)
+        if group_index is None:
+            return
+        picks_left = remaining.pop(group_index)
+        if picks_left > 1:
+            remaining[group_index] = picks_left - 1
+        previous = last[group_index]
+        for uid in iter_bits(candidates):
+            last[group_index] = uid
+            next_allowed, next_load = self._advance(allowed, load, uid)
+            self._count(next_allowed, next_load, remaining, last, counter, limit, deadline,
+                        weight * self.class_size[uid])
+            if limit is not None and counter[0] >= limit:
+                break
+        last[group_index] = previous
+        remaining[group_index] = picks_left
+
+    def count_member_subsets(self, group_index, limit=None, deadline=None):
+        """Find the distinct member sets (courses) that can fill a pick-k group in a full timetable.
+
+        Members are enumerated in sorted order, one unit per member, and a prefix
+        whose units leave another group empty is never extended. Returns
+        (sorted list of member tuples, exact).
+        """
+        picks = self.group_picks[group_index]
+        member_masks = {}
+        for uid in iter_bits(self.group_masks[group_index]):
+            member = self.unit_sections[uid][0][0]
+            member_masks[member] = member_masks.get(member, 0) | (1 << uid)
+        members = sorted(member_masks)
+        others = {index: count for index, count in enumerate(self.group_picks) if index != group_index}
+        found = set()
+        try:
+            if not self._is_dead():
+                self._fill_members(members, member_masks, 0, [], self.alive_mask, self._empty_load, picks,
+                                   others, found, limit, deadline)
+        except SearchTimeout:
+            return sorted(found), False
+        exact = limit is None or len(found) < limit
+        return sorted(found), exact
+
+    def _fill_members(self, members, member_masks, start, chosen, allowed, load, picks, others, found, limit,
+                      deadline):
+        if len(chosen) == picks:
+            key = tuple(chosen)
+            if key not in found and self._has_solution(allowed, load, others, deadline):
+                found.add(key)
+            return key in found
+        if deadline is not None and time_module.time() > deadline:
+            raise SearchTimeout()
+        if any((allowed & self.group_masks[index]).bit_count() < count for index, count in others.items()):
+            return False
+        for index in range(start, len(members) - (picks - len(chosen)) + 1):
+            chosen.append(members[index])
+            for uid in iter_bits(allowed & member_masks[members[index]]):
+                next_allowed, next_load = self._advance(allowed, load, uid)
+                filled = self._fill_members(members, member_masks, index + 1, chosen, next_allowed, next_load,
+                                            picks, others, found, limit, deadline)
+                if filled and len(chosen) == picks:
+                    break  # Other sections of the last member would find the same set
+            chosen.pop()
+            if limit is not None and len(found) >= limit:
+                return False
+        return False
+
+    def estimate(self, probes=ESTIMATE_PROBES, rng=None):
+        """Knuth's random-probe estimate of (solution count, search tree nodes)"""
+        if self._is_dead():
+            return 0.0, 0.0
+        rng = rng or random.Random(DEFAULT_SEED)
+        total_solutions = 0.0
+        total_nodes = 0.0
+        for _ in range(probes):
+            allowed, load = self.alive_mask, self._empty_load
+            remaining, last, _ = self._start_state()
+            weight = 1.0           # Concrete solutions behind this probe
+            branching = 1.0        # Search tree nodes at the current depth
+            nodes = 1.0
+            while remaining:
+                group_index, candidates = self._most_constrained(allowed, remaining, last)
+                if group_index is None:
+                    weight = 0.0
+                    break
+                uids = list(iter_bits(candidates))
+                branching *= len(uids)
+                nodes += branching
+                uid = rng.choice(uids)
+                weight *= len(uids) * self.class_size[uid]
+                allowed, load = self._advance(allowed, load, uid)
+                last[group_index] = uid
+                remaining[group_index] -= 1
+                if not remaining[group_index]:
+                    del remaining[group_index]
+            total_solutions += weight
+            total_nodes += nodes
+        return total_solutions / probes, total_nodes / probes
+
+    # ------------------------------------------------------------------
+    # Hard limits
+    # ------------------------------------------------------------------
+
+    def limited(self, max_days=None, earliest_start=None, latest_end=None, max_daily_minutes=None):
+        """A view that only allows timetables within hard structural limits.
+
+        Earliest start and latest end rule out single units, so they are applied
+        like blocked windows. Days on campus and daily contact minutes depend on
+        the whole timetable: every pick advances a load (day bitmask, minutes per
+        day) and cuts the allowed mask down to the units that still fit, so
+        forward checking sees the limits and a broken branch is never entered.
+        """
+        view = copy.copy(self)
+        view._unit_loads = [_rows_load(rows) for rows in self.unit_rows]
+        view._day_fit_cache = {}
+        view._heavier_cache = {}
+        if max_days is not None or max_daily_minutes is not None:
+            view.limits = (max_days, max_daily_minutes)
+            view._empty_load = (0, (0,) * len(DAY_NAMES))
+        allowed_units = 0
+        for uid, rows in enumerate(self.unit_rows):
+            if earliest_start is not None and any(days and start < earliest_start for days, start, _ in rows):
+                continue
+            if latest_end is not None and any(days and end > latest_end for days, _, end in rows):
+                continue
+            if view.limits is not None and not view._load_fits(view._unit_loads[uid]):
+                continue
+            allowed_units |= 1 << uid
+        return view.restricted(allowed_units=allowed_units)
+
+    def _load_fits(self, load):
+        max_days, max_daily_minutes = self.limits
+        day_mask, minutes = load
+        if max_days is not None and day_mask.bit_count() > max_days:
+            return False
+        return max_daily_minutes is None or max(minutes) <= max_daily_minutes
+
+    def _within_limits(self, solution):
+        load = self._empty_load
+        for uid in solution:
+            load = _add_load(load, self._unit_loads[uid])
+        return self._load_fits(load)
+
+    def _fitting(self, load):
+        """Bitset of units that can join a timetable with this load without breaking a limit"""
+        max_days, max_daily_minutes = self.limits
+        day_mask, minutes = load
+        mask = -1
+        if max_days is not None:
+            mask = self._day_fit_cache.get(day_mask)
+            if mask is None:
+                mask = 0
+                for uid, (unit_days, _) in enumerate(self._unit_loads):
+                    if (day_mask | unit_days).bit_count() <= max_days:
+                        mask |= 1 << uid
+                self._day_fit_cache[day_mask] = mask
+        if max_daily_minutes is not None:
+            for day in iter_bits(day_mask):
+                mask &= ~self._heavier(day, max_daily_minutes - minutes[day])
+        return mask
+
+    def _heavier(self, day, spare):
+        """Bitset of units meeting longer than spare minutes on a day"""
+        key = (day, spare)
+        mask = self._heavier_cache.get(key)
+        if mask is None:
+            mask = 0
+            for uid, (_, unit_minutes) in enumerate(self._unit_loads):
+                if unit_minutes[day] > spare:
+                    mask |= 1 << uid
+            self._heavier_cache[key] = mask
+        return mask
+
+    def _advance(self, allowed, load, uid):
+        """Pick a unit: keep the units compatible with it and, under limits, those that still fit"""
+        allowed &= self.compat[uid]
+        if load is None:
+            return allowed, None
+        load = _add_load(load, self._unit_loads[uid])
+        return allowed & self._fitting(load), load
+
+    # ------------------------------------------------------------------
+    # Infeasibility explanation
+    # ------------------------------------------------------------------
+
+    def restricted(self, group_picks=None, allowed_units=None):
+        """A view of this space with other pick counts and/or only some units enabled.
+
+        Groups with a pick count of zero take no part. allowed_units is a bitset of
+        concrete uids; equivalence classes keep only their allowed members.
+        """
+        view = copy.copy(self)
+        if group_picks is not None:
+            view.group_picks = list(group_picks)
+        if allowed_units is not None:
+            view.class_members = {}
+            view.class_of = {}
+            view.class_size = list(self.class_size)
+            view.rep_mask = 0
+            for members in self.class_members.values():
+                kept = [uid for uid in members if (allowed_units >> uid) & 1]
+                if not kept:
+                    continue
+                representative = kept[0]  # Members share their compat row, any one can stand in
+                view.class_members[representative] = kept
+                view.class_size[representative] = len(kept)
+                view.rep_mask |= 1 << representative
+                for uid in kept:
+                    view.class_of[uid] = representative
+            view.has_classes = any(len(kept) > 1 for kept in view.class_members.values())
+        view._prune_domains()
+        return view
+
+    def supported_units(self, deadline=None):
+        """Concrete units that appear in at least one solution.
+
+        Every candidate unit is fixed in turn and completed by the bitset search;
+        each solution found witnesses all of its units at once, so most units are
+        settled without a search of their own. Returns (supported, undecided)
+        bitsets; undecided units ran out of time before a completion was found.
+        """
+        supported = 0
+        undecided = 0
+        if self._is_dead():
+            return 0, 0
+        for group_index, mask in enumerate(self.group_masks):
+            if not self.group_picks[group_index]:
+                continue
+            for uid in iter_bits(mask):
+                if (supported >> uid) & 1:
+                    continue
+                remaining, last, chosen = self._start_state()
+                remaining[group_index] -= 1
+                if not remaining[group_index]:
+                    del remaining[group_index]
+                chosen[group_index].append(uid)
+                try:
+                    allowed, load = self._advance(self.alive_mask, self._empty_load, uid)
+                    solution = next(self._search(allowed, load, remaining, last, chosen, deadline, None), None)
+                except SearchTimeout:
+                    undecided |= 1 << uid
+                    continue
+                for witness in solution or ():
+                    supported |= 1 << witness
+        concrete_supported = 0
+        concrete_undecided = 0
+        for representative, members in self.class_members.items():
+            for uid in members:
+                if (supported >> representative) & 1:
+                    concrete_supported |= 1 << uid
+                elif (undecided >> representative) & 1:
+                    concrete_undecided |= 1 << uid
+        return concrete_supported, concrete_undecided
+
+    def is_feasible(self, deadline=None):
+        """Whether at least one timetable exists (raises SearchTimeout past the deadline)"""
+        return next(self.iter_solutions(deadline), None) is not None
+
+    def conflict_core(self, time_budget=CORE_TIME_BUDGET):
+        """Find a small set of groups that cannot be scheduled together.
+
+        Deletion filter: starting from every group, drop each group whose removal
+        keeps the rest infeasible. Every check is a search on a restricted view,
+        and a check that runs out of time keeps its group, so the returned core is
+        always proven infeasible. Returns None when the space is feasible or its
+        infeasibility could not be shown in time.
+        """
+        deadline = time_module.time() + time_budget
+        active = [group_index for group_index, picks in enumerate(self.group_picks) if picks]
+
+        def infeasible(groups):
+            picks = [self.group_picks[index] if index in groups else 0 for index in range(self.group_count)]
+            try:
+                return not self.restricted(picks).is_feasible(deadline)
+            except SearchTimeout:
+                return False
+
+        core = set(active)
+        if not core or not infeasible(core):
+            return None
+        # Large domains are the least likely to be part of the conflict, try them first
+        for group_index in sorted(active, key=lambda index: -len(self.group_units[index])):
+            if len(core) > 1 and infeasible(core - {group_index}):
+                core.discard(group_index)
+        return sorted(core)
+
+    def _first_clash(self, sections1, sections2):
+        for key1 in sections1:
+            for key2 in sections2:
+                if key1 != key2:
+                    reason = self.clash_reason(key1, key2)
+                    if reason:
+                        return key1, key2, reason
+        return None
+
+    def explain_core(self, core, max_conflicts=MAX_CORE_CONFLICTS):
+        """List the section pairs that make the groups of a core incompatible.
+
+        Returns (conflicts, total) where conflicts are (section, section, reason)
+        tuples: units that are invalid on their own, then clashes between units
+        of different core groups.
+        """
+        conflicts = []
+        total = 0
+        for group_index in core:
+            for uid in self.group_units[group_index]:
+                if (self.valid_mask >> uid) & 1:
+                    continue
+                sections = self.unit_sections[uid]
+                clash = self._first_clash(sections, sections)
+                if clash:
+                    total += 1
+                    conflicts.append(clash)
+        for i, group1 in enumerate(core):
+            # Pick-k groups can also fail on clashes between their own members
+            partners = core[i:] if self.group_picks[group1] > 1 else core[i + 1:]
+            for group2 in partners:
+                for uid1 in self.group_units[group1]:
+                    if not (self.valid_mask >> uid1) & 1:
+                        continue
+                    for uid2 in self.group_units[group2]:
+                        if group1 == group2 and (uid2 <= uid1 or self.unit_sections[uid1][0][0] == self.unit_sections[uid2][0][0]):
+                            continue
+                        if not (self.valid_mask >> uid2) & 1 or (self.compat[uid1] >> uid2) & 1:
+                            continue
+                        clash = self._first_clash(self.unit_sections[uid1], self.unit_sections[uid2])
+                        if clash:
+                            total += 1
+                            conflicts.append(clash)
+        return conflicts[:max_conflicts], total
+
+    def expand_classes(self, solution):
+        """Lazily yield every concrete solution behind a solution over class representatives"""
+        return itertools.product(*(self.class_members[uid] for uid in solution))
+
+    def random_member(self, solution, rng):
+        """Pick one concrete solution behind a solution over class representatives"""
+        return tuple(rng.choice(self.class_members[uid]) for uid in solution)
+
+    def alternatives(self, solution):
+        """Equivalent sections per course for a solution over class representatives"""
+        equivalent = {}
+        for uid in solution:
+            members = self.class_members[uid]
+            if len(members) < 2:
+                continue
+            for member in members:
+                for course_code, section in self.unit_sections[member]:
+                    sections = equivalent.setdefault(course_code, [])
+                    if section not in sections:
+                        sections.append(section)
+        return equivalent
+
+    def solution_units(self, sections):
+        """uids of a concrete solution given as (course_code, section) pairs, or None if it is not one"""
+        keys = set(sections)
+        solution = tuple(
+            uid for uids in self.group_units for uid in uids
+            if all(key in keys for key in self.unit_sections[uid])
+        )
+        covered = {key for uid in solution for key in self.unit_sections[uid]}
+        picked = [sum(1 for uid in solution if self.units[uid][0] == g) for g in range(self.group_count)]
+        if covered != keys or picked != self.group_picks:
+            return None
+        return solution
+
+    def neighbors(self, solution):
+        """Concrete solutions that differ from a concrete solution in exactly one unit.
+
+        The units that can replace a picked unit are its group's live units ANDed
+        with the compat rows of every other picked unit, so no search is needed.
+        Yields (position, replacement uid) pairs.
+        """
+        usable = 0
+        for representative in iter_bits(self.alive_mask):
+            for uid in self.class_members[representative]:
+                usable |= 1 << uid
+        for position, uid in enumerate(solution):
+            allowed = usable
+            for other_position, other in enumerate(solution):
+                if other_position != position:
+                    allowed &= self.compat[other]
+            for replacement in self.group_units[self.units[uid][0]]:
+                if replacement == uid or not (allowed >> replacement) & 1:
+                    continue
+                if self.limits is not None and not self._within_limits(
+                        solution[:position] + (replacement,) + solution[position + 1:]):
+                    continue
+                yield position, replacement
+
+    def solution_sections(self, solution):
+        """The (course_code, section) keys of a solution's units"""
+        return [key for uid in solution for key in self.unit_sections[uid]]
+
+
+# ----------------------------------------------------------------------
+# Preference scoring (same rules as progress_archive.file_processor)
+# ----------------------------------------------------------------------
+
+NO_MEETING = 10 ** 6             # Padding start/end minute that sorts after every real meeting
+DAY_POPCOUNT = np.array([bin(mask).count('1') for mask in range(1 << len(DAY_NAMES))], dtype=np.int64)
+
+
+class SectionFeatures:
+    """Per-section feature vectors for scoring whole batches of timetables with numpy.
+
+    Built once per catalog from the section rows. Row n of every array describes
+    section n; one extra empty section at the end pads batches of timetables
+    with different numbers of sections. The rules are those of
+    score_combinations_by_preferences, applied to meeting rows. The same
+    arrays answer which sections fit around a given set of meetings.
+    """
+
+    def __init__(self, section_rows):
+        self.index = {key: position for position, key in enumerate(section_rows)}
+        self.padding = len(section_rows)
+        per_day = [len(intervals) for rows in section_rows.values() for intervals in _day_intervals(rows).values()]
+        slots = max(per_day, default=1)
+        count = len(section_rows) + 1
+        self.early = np.zeros(count, dtype=np.int64)
+        self.late = np.zeros(count, dtype=np.int64)
+        self.lunch = np.zeros(count, dtype=bool)
+        self.day_mask = np.zeros(count, dtype=np.int64)
+        self.starts = np.full((count, len(DAY_NAMES), slots), NO_MEETING, dtype=np.int64)
+        self.ends = np.full((count, len(DAY_NAMES), slots), NO_MEETING, dtype=np.int64)
+        for position, rows in enumerate(section_rows.values()):
+            self.early[position] = sum(1 for _, start, _ in rows if start < 9 * 60)
+            self.late[position] = sum(1 for _, start, _ in rows if start >= 18 * 60)
+            self.lunch[position] = any(start < 13 * 60 and end // 60 > 12 for _, start, end in rows)
+            for day, intervals in _day_intervals(rows).items():
+                self.day_mask[position] |= 1 << day
+                for slot, (start, end) in enumerate(intervals):
+                    self.starts[position, day, slot] = start
+                    self.ends[position, day, slot] = end
+
+    def clear_of(self, rows):
+        """Boolean array over sections: True where no meeting overlaps any of these meeting rows"""
+        clear = np.ones(self.padding, dtype=bool)
+        for day, intervals in _day_intervals(rows).items():
+            starts, ends = self.starts[:self.padding, day], self.ends[:self.padding, day]
+            for start, end in intervals:
+                clear &= ~((starts < end) & (start < ends)).any(axis=1)
+        return clear
+
+    def within_limits(self, rows, max_days=None, earliest_start=None, latest_end=None, max_daily_minutes=None):
+        """Boolean array over sections: True where adding the section to a timetable with these
+        meeting rows keeps it within the hard limits (the keywords of SearchSpace.limited)"""
+        starts, ends = self.starts[:self.padding], self.ends[:self.padding]
+        meets = starts != NO_MEETING
+        within = np.ones(self.padding, dtype=bool)
+        if earliest_start is not None:
+            within &= ~(meets & (starts < earliest_start)).any(axis=(1, 2))
+        if latest_end is not None:
+            within &= ~(meets & (ends > latest_end)).any(axis=(1, 2))
+        day_mask, minutes = _rows_load(rows)
+        if max_days is not None:
+            within &= DAY_POPCOUNT[self.day_mask[:self.padding] | day_mask] <= max_days
+        if max_daily_minutes is not None:
+            daily = np.where(meets, ends - starts, 0).sum(axis=2) + np.array(minutes)
+            within &= (daily <= max_daily_minutes).all(axis=1)
+        return within
+
+    def ids(self, sections):
+        """Section ids of a list of (course_code, section) keys"""
+        return [self.index[key] for key in sections]
+
+    def batch(self, section_lists):
+        """Pad lists of section ids into one (timetables, sections) array"""
+        width = max((len(ids) for ids in section_lists), default=0)
+        batch = np.full((len(section_lists), width), self.padding, dtype=np.int64)
+        for row, ids in enumerate(section_lists):
+            batch[row, :len(ids)] = ids
+        return batch
+
+    def score(self, batch, preferences):
+        """Score every row of a (timetables, sections) id array"""
+        scores = np.zeros(len(batch), dtype=np.int64)
+        if len(batch) == 0:
+            return scores
+        if preferences.get('avoid_early_morning', False):
+            scores += 10 - self.early[batch].sum(axis=1) * 2
+        if preferences.get('avoid_late_evening', False):
+            scores += 10 - self.late[batch].sum(axis=1) * 2
+        if preferences.get('avoid_long_gaps', False):
+            timetables, width = batch.shape
+            # (timetables, days, meetings) with each day's meetings sorted by start
+            starts = self.starts[batch].transpose(0, 2, 1, 3).reshape(timetables, len(DAY_NAMES), -1)
+            ends = self.ends[batch].transpose(0, 2, 1, 3).reshape(timetables, len(DAY_NAMES), -1)
+            order = np.argsort(starts, axis=2, kind='stable')
+            starts = np.take_along_axis(starts, order, axis=2)
+            ends = np.take_along_axis(ends, order, axis=2)
+            long_gaps = (starts[:, :, 1:] // 60 - ends[:, :, :-1] // 60 > 2) & (starts[:, :, 1:] < NO_MEETING)
+            scores += 10 - long_gaps.sum(axis=(1, 2)) * 3
+        if preferences.get('minimize_commute', False):
+            days = np.bitwise_or.reduce(self.day_mask[batch], axis=1)
+            scores += 15 - DAY_POPCOUNT[days] * 2
+        if preferences.get('lunch_break', False):
+            scores += np.where(self.lunch[batch].any(axis=1), 0, 5)
+        return np.maximum(scores, 0)
+
+
+def has_preferences(preferences):
+    return bool(preferences) and any(preferences.values())
+
+
+# ----------------------------------------------------------------------
+# Planner
+# ----------------------------------------------------------------------
+
+def plan_search(space, preferences=None, max_results=300, strategy=None, group_labels=None):
+    """Pick a search engine from the size and shape of the compiled space"""
+    raw_product = space.product(space.raw_sizes)
+    pruned_product = space.product(space.pruned_sizes)
+    estimated_solutions, estimated_nodes = space.estimate()
+    shortfalls = space.member_shortfalls()
+
+    if shortfalls:
+        group_index, picks, available = shortfalls[0]
+        name = group_labels[group_index] if group_labels else f'group {group_index}'
+        chosen, reason = 'infeasible', f'category {name} needs {picks} courses but only {available} are available'
+    elif pruned_product == 0:
+        chosen, reason = 'infeasible', 'a course has no section compatible with every other course'
+    elif strategy:
+        chosen, reason = strategy, 'requested explicitly'
+    elif has_preferences(preferences):
+        chosen, reason = 'top_k', 'preferences are set, keeping the best scoring timetables'
+    elif (pruned_product <= EXHAUSTIVE_LIMIT and _block_applicable(space) and max_results >= estimated_solutions
+          and estimated_solutions >= BLOCK_MIN_YIELD * pruned_product):
+        # Walking everything of a dense space: vector checks beat per-node Python work
+        chosen, reason = 'block', f'every timetable is wanted and ~{estimated_solutions / pruned_product:.0%} of the pruned space is valid'
+    elif pruned_product <= EXHAUSTIVE_LIMIT:
+        chosen, reason = 'exhaustive', f'pruned space of {pruned_product} candidates is small'
+    else:
+        chosen, reason = 'diverse', f'pruned space of {pruned_product} candidates is too large to walk'
+
+    return {
+        'strategy': chosen,
+        'reason': reason,
+        'raw_product': raw_product,
+        'pruned_product': pruned_product,
+        'domain_sizes': space.raw_sizes,
+        'pruned_domain_sizes': space.pruned_sizes,
+        'group_picks': space.group_picks,
+        'conflict_density': round(space.conflict_density, 4),
+        'equivalence_classes': len(space.class_members),
+        'collapsed_units': space.valid_mask.bit_count() - len(space.class_members),
+        'estimated_solutions': round(estimated_solutions),
+        'estimated_cost': round(estimated_nodes),
+        'max_results': max_results,
+    }
+
+
+def run_plan(space, plan, max_results=300, deadline=None, preferences=None, seed=None, collapse=False):
+    """Execute a plan from plan_search; returns a list of solutions (tuples of uids).
+
+    With collapse=True each solution is over class representatives and stands for
+    every equivalent timetable; otherwise classes are expanded to concrete units.
+    """
+    strategy = plan['strategy']
+    if strategy == 'infeasible':
+        return []
+    if strategy == 'top_k':
+        solutions = top_k_solutions(space, preferences or {}, max_results, deadline)
+    elif strategy == 'sample':
+        return sample_solutions(space, plan, max_results, deadline, seed, collapse)
+    elif strategy == 'diverse':
+        return diverse_solutions(space, plan, max_results, deadline, seed, collapse)
+    elif strategy == 'pareto':
+        return pareto_solutions(space, plan, max_results, deadline)
+    elif strategy == 'block':
+        solutions = block_solutions(space, plan, max_results, deadline)
+    else:
+        solutions = first_solutions(space, max_results, deadline)
+    if collapse:
+        return solutions
+    return list(itertools.islice(
+        (concrete for solution in solutions for concrete in space.expand_classes(solution)),
+        max_results
+    ))
+
+
+def first_solutions(space, max_results, deadline=None):
+    """Exhaustive engine: walk the space in search order until max_results are found"""
+    solutions = []
+    try:
+        for solution in space.iter_solutions(deadline):
+            solutions.append(solution)
+            if len(solutions) >= max_results:
+                break
+    except SearchTimeout:
+        pass
+    return solutions
+
+
+def _block_applicable(space):
+    return all(picks <= 1 for picks in space.group_picks) and space.limits is None
+
+
+def block_solutions(space, plan, max_results, deadline=None):
+    """Block engine: enumerate the pruned product in blocks of index tuples, validated with numpy.
+
+    Candidate number k is decoded in mixed radix into one unit per group. For
+    each pair of groups the compat bits are gathered from a dense matrix over
+    the domain units, and candidates that fail are dropped before the next pair,
+    so a block costs a handful of vector operations. Pick-k groups and hard
+    limits need the search state, so those spaces fall back to backtracking.
+    """
+    if not _block_applicable(space):
+        plan['block_fallback'] = 'pick-k groups or hard limits need backtracking'
+        return first_solutions(space, max_results, deadline)
+    active = [group_index for group_index, picks in enumerate(space.group_picks) if picks]
+    if space._is_dead() or not active:
+        return []
+
+    domains = [np.array(list(iter_bits(space.group_masks[group_index])), dtype=np.int64) for group_index in active]
+    local_uids = np.concatenate(domains)
+    offsets = np.cumsum([0] + [len(domain) for domain in domains[:-1]])
+    unit_count = len(space.units)
+    width = (unit_count + 7) // 8
+    compat_rows = np.array([
+        np.unpackbits(np.frombuffer(space.compat[uid].to_bytes(width, 'little'), dtype=np.uint8),
+                      bitorder='little')[:unit_count]
+        for uid in local_uids.tolist()
+    ], dtype=bool)
+    matrix = compat_rows[:, local_uids]  # Compatibility between domain units, in local ids
+
+    # Check the most constrained group pairs first so most candidates drop out early
+    sizes = [len(domain) for domain in domains]
+    pairs = [(i, j) for i in range(len(active)) for j in range(i + 1, len(active))]
+    pairs.sort(key=lambda pair: matrix[offsets[pair[0]]:offsets[pair[0]] + sizes[pair[0]],
+                                       offsets[pair[1]]:offsets[pair[1]] + sizes[pair[1]]].mean())
+
+    total = math.prod(sizes)
+    solutions = []
+    complete = True
+    for start in range(0, total, BLOCK_SIZE):
+        if deadline is not None and time_module.time() > deadline:
+            complete = False
+            break
+        index = np.arange(start, min(start + BLOCK_SIZE, total), dtype=np.int64)
+        digits = [None] * len(sizes)
+        for position in range(len(sizes) - 1, -1, -1):
+            index, digits[position] = np.divmod(index, sizes[position])
+        local = [digit + offset for digit, offset in zip(digits, offsets)]
+        alive = np.arange(len(local[0]))
+        for i, j in pairs:
+            alive = alive[matrix[local[i][alive], local[j][alive]]]
+            if not len(alive):
+                break
+        if len(alive):
+            block = np.stack([local_uids[column[alive]] for column in local], axis=1)
+            solutions.extend(map(tuple, block[:max_results - len(solutions)].tolist()))
+            if len(solutions) >= max_results:
+                break
+    plan['block_complete'] = complete
+    return solutions
+
+
+def top_k_solutions(space, preferences, max_results, deadline=None):
+    """Top-K engine: keep the best scoring solutions seen before the deadline.
+
+    Solutions are scored in numpy batches: each unit's section ids are padded
+    into one row of a lookup table, so a batch of solutions becomes a single
+    gather into the section feature arrays.
+    """
+    features = space.features or SectionFeatures(space._section_rows)
+    unit_ids = features.batch([features.ids(sections) for sections in space.unit_sections])
+    kept_scores = np.zeros(0, dtype=np.int64)
+    kept_order = np.zeros(0, dtype=np.int64)
+    kept = []
+    pending = []
+    seen = 0
+
+    def flush():
+        nonlocal kept_scores, kept_order, kept, seen
+        batch = unit_ids[np.array(pending, dtype=np.int64)].reshape(len(pending), -1)
+        scores = np.concatenate([kept_scores, features.score(batch, preferences)])
+        order = np.concatenate([kept_order, np.arange(seen, seen + len(pending))])
+        candidates = kept + pending
+        # Highest score first, earlier solutions win ties
+        best = np.lexsort((order, -scores))[:max_results]
+        kept_scores, kept_order = scores[best], order[best]
+        kept = [candidates[index] for index in best]
+        seen += len(pending)
+        pending.clear()
+
+    try:
+        for solution in space.iter_solutions(deadline):
+            pending.append(solution)
+            if len(pending) >= SCORE_BATCH_SIZE:
+                flush()
+    except SearchTimeout:
+        pass
+    if pending:
+        flush()
+    return kept
+
+
+def sample_solutions(space, plan, max_results, deadline=None, seed=None, collapse=False):
+    """Counting plus sampling engine: count what we can, then collect randomized restarts"""
+    seed = DEFAULT_SEED if seed is None else seed
+    rng = random.Random(seed)
+    now = time_module.time()
+    count_deadline = None
+    if deadline is not None:
+        count_deadline = now + max(deadline - now, 0) * COUNT_TIME_SHARE
+    count, exact = space.count_solutions(limit=COUNT_LIMIT, deadline=count_deadline)
+    plan['counted_solutions'] = count
+    plan['count_exact'] = exact
+    plan['seed'] = seed
+
+    seen = set()
+    solutions = []
+    attempts = 0
+    max_attempts = max_results * 20
+    while len(solutions) < max_results and attempts < max_attempts:
+        attempts += 1
+        try:
+            solution = next(space.iter_solutions(deadline, rng), None)
+        except SearchTimeout:
+            break
+        if solution is None:
+            break
+        if not collapse:
+            solution = space.random_member(solution, rng)
+        if solution not in seen:
+            seen.add(solution)
+            solutions.append(solution)
+        if exact and not collapse and len(seen) >= count:
+            break
+    return solutions
+
+
+def _solution_signature(space, solution):
+    """Features used to compare timetables: units, days on campus and start-time buckets"""
+    day_mask = 0
+    start_mask = 0
+    for uid in solution:
+        for days, start, _ in space.unit_rows[uid]:
+            for day in days:
+                day_mask |= 1 << day
+            start_mask |= 1 << (start // START_BUCKET_MINUTES)
+    return frozenset(solution), day_mask, start_mask
+
+
+def _signature_distance(signature1, signature2):
+    """Distance in [0, 3]: share of differing units + differing campus days + differing start times"""
+    units1, days1, starts1 = signature1
+    units2, days2, starts2 = signature2
+    unit_distance = len(units1 ^ units2) / (len(units1) + len(units2) or 1)
+    day_distance = (days1 ^ days2).bit_count() / len(DAY_NAMES)
+    start_distance = (starts1 ^ starts2).bit_count() / ((starts1 | starts2).bit_count() or 1)
+    return unit_distance + day_distance + start_distance
+
+
+def diverse_solutions(space, plan, max_results, deadline=None, seed=None, collapse=False):
+    """Diverse-sample engine: gather randomized restarts, then keep a max-min diverse subset.
+
+    Candidates come from randomized depth-first restarts (random unit order and a
+    random member of each equivalence class), so the pool is not tied to the first
+    course's first section. The kept timetables are chosen greedily, each one the
+    candidate farthest from everything already kept.
+    """
+    seed = DEFAULT_SEED if seed is None else seed
+    rng = random.Random(seed)
+    pool_size = max_results * DIVERSE_POOL_FACTOR
+    pool_deadline = time_module.time() + DIVERSE_TIME_BUDGET
+    if deadline is not None:
+        pool_deadline = min(pool_deadline, deadline)
+
+    seen = set()
+    pool = []
+    misses = 0
+    while len(pool) < pool_size and misses < pool_size:
+        try:
+            solution = next(space.iter_solutions(pool_deadline, rng), None)
+        except SearchTimeout:
+            break
+        if solution is None:
+            break
+        if not collapse:
+            solution = space.random_member(solution, rng)
+        if solution in seen:
+            misses += 1  # Small spaces run out of new timetables quickly
+            continue
+        seen.add(solution)
+        pool.append(solution)
+
+    plan['seed'] = seed
+    plan['candidate_pool'] = len(pool)
+    if len(pool) <= max_results:
+        return pool
+
+    signatures = [_solution_signature(space, solution) for solution in pool]
+    first = rng.randrange(len(pool))
+    selected = [first]
+    nearest = [_signature_distance(signatures[first], signature) for signature in signatures]
+    nearest[first] = -1.0
+    while len(selected) < max_results:
+        best = max(range(len(pool)), key=nearest.__getitem__)
+        selected.append(best)
+        nearest[best] = -1.0
+        best_signature = signatures[best]
+        for index, distance in enumerate(nearest):
+            if distance > 0:
+                nearest[index] = min(distance, _signature_distance(best_signature, signatures[index]))
+    return [pool[index] for index in selected]
+
+
+def pareto_solutions(space, plan, max_results, deadline=None):
+    """Pareto engine: timetables not dominated on days on campus, idle minutes, earliest start and latest end.
+
+    All four objectives are minimized (earliest start through its negation).
+    Days, earliest start and latest end only get worse as units are added, so a
+    partial timetable bounds every completion; idle time is bounded by the gaps
+    that no remaining candidate can fill. A branch is cut once a kept timetable
+    is at least as good as that bound everywhere, so dominated regions are never
+    enumerated. One timetable is kept per distinct objective vector.
+    """
+    unit_days = [_day_intervals(rows) for rows in space.unit_rows]
+    archive = []  # (objectives, solution)
+
+    def idle_minutes(by_day):
+        return sum(
+            max(intervals[i + 1][0] - intervals[i][1], 0)
+            for intervals in by_day.values() for i in range(len(intervals) - 1)
+        )
+
+    def unfillable_idle(by_day, allowed, remaining):
+        gaps = {
+            day: [(intervals[i][1], intervals[i + 1][0]) for i in range(len(intervals) - 1)
+                  if intervals[i + 1][0] > intervals[i][1]]
+            for day, intervals in by_day.items()
+        }
+        candidates = 0
+        for group_index in remaining:
+            candidates |= allowed & space.group_masks[group_index]
+        covers = {}
+        for uid in iter_bits(candidates):
+            for day, intervals in unit_days[uid].items():
+                if gaps.get(day):
+                    covers.setdefault(day, []).extend(intervals)
+        total = 0
+        for day, day_gaps in gaps.items():
+            covering = sorted(covers.get(day, ()))
+            for gap_start, gap_end in day_gaps:
+                position = gap_start
+                for start, end in covering:
+                    if end <= position or start >= gap_end:
+                        continue
+                    if start > position:
+                        total += start - position
+                    position = max(position, end)
+                    if position >= gap_end:
+                        break
+                total += max(gap_end - position, 0)
+        return total
+
+    def cut(by_day, first, last_end, allowed, remaining):
+        bound_days, bound_first = len(by_day), -first
+        near = [objectives[1] for objectives, _ in archive
+                if objectives[0] <= bound_days and objectives[2] <= bound_first and objectives[3] <= last_end]
+        if not near or min(near) > idle_minutes(by_day):
+            return False
+        return min(near) <= unfillable_idle(by_day, allowed, remaining)
+
+    def keep(objectives, solution):
+        if any(all(a <= b for a, b in zip(kept, objectives)) for kept, _ in archive):
+            return
+        archive[:] = [(kept, kept_solution) for kept, kept_solution in archive
+                      if not all(a <= b for a, b in zip(objectives, kept))]
+        archive.append((objectives, solution))
+
+    def visit(allowed, load, remaining, last, chosen, by_day, first, last_end):
+        if not remaining:
+            objectives = (len(by_day), idle_minutes(by_day), -first, last_end)
+            keep(objectives, tuple(uid for picks in chosen for uid in picks))
+            return
+        if deadline is not None and time_module.time() > deadline:
+            raise SearchTimeout()
+        if by_day and cut(by_day, first, last_end, allowed, remaining):
+            return
+        group_index, candidates = space._most_constrained(allowed, remaining, last)
+        if group_index is None:
+            return
+        picks_left = remaining.pop(group_index)
+        if picks_left > 1:
+            remaining[group_index] = picks_left - 1
+        previous = last[group_index]
+        for uid in iter_bits(candidates):
+            next_by_day = dict(by_day)
+            for day, intervals in unit_days[uid].items():
+                next_by_day[day] = tuple(sorted(next_by_day.get(day, ()) + tuple(intervals)))
+            rows = space.unit_rows[uid]
+            next_first = min([first] + [start for days, start, _ in rows if days])
+            next_last_end = max([last_end] + [end for days, _, end in rows if days])
+            last[group_index] = uid
+            chosen[group_index].append(uid)
+            next_allowed, next_load = space._advance(allowed, load, uid)
+            visit(next_allowed, next_load, remaining, last, chosen, next_by_day, next_first, next_last_end)
+            chosen[group_index].pop()
+        last[group_index] = previous
+        remaining[group_index] = picks_left
+
+    complete = True
+    if not space._is_dead():
+        remaining, last, chosen = space._start_state()
+        try:
+            visit(space.alive_mask, space._empty_load, remaining, last, chosen, {}, 24 * 60, 0)
+        except SearchTimeout:
+            complete = False
+
+    archive.sort()
+    plan['pareto_complete'] = complete
+    plan['pareto_front'] = [
+        {
+            'days_on_campus': objectives[0],
+            'idle_minutes': objectives[1],
+            'earliest_start': f"{-objectives[2] // 60:02d}:{-objectives[2] % 60:02d}",
+            'latest_end': f"{objectives[3] // 60:02d}:{objectives[3] % 60:02d}",
+        }
+        for objectives, _ in archive[:max_results]
+    ]
+    return [solution for _, solution in archive[:max_results]]
+
+
+def repair_search(view_for, candidate_edits, max_edits=MAX_REPAIR_EDITS, deadline=None,
+                  max_frontier=MAX_REPAIR_FRONTIER):
+    """Core-guided breadth-first search for the smallest edit sets that make a space feasible.
+
+    view_for(edits) returns the space after applying a tuple of edits, and
+    candidate_edits(group_index, edits) the single edits that could change that
+    group. Any repair has to touch at least one group of the current conflict
+    core, so only those edits are tried at each depth. Returns (repairs, complete)
+    where repairs are (edits, view) pairs and no repair contains a smaller one.
+    """
+    frontier = [()]
+    seen = {frozenset()}
+    repairs = []
+    complete = True
+    try:
+        for _ in range(max_edits):
+            next_frontier = []
+            for edits in frontier:
+                budget = CORE_TIME_BUDGET if deadline is None else deadline - time_module.time()
+                if budget <= 0:
+                    raise SearchTimeout()
+                core = view_for(edits).conflict_core(budget)
+                if core is None:
+                    complete = False  # Could not prove the conflict in time
+                    continue
+                for group_index in core:
+                    for edit in candidate_edits(group_index, edits):
+                        key = frozenset(edits + (edit,))
+                        if key in seen or any(set(found) <= key for found, _ in repairs):
+                            continue
+                        seen.add(key)
+                        view = view_for(edits + (edit,))
+                        if view.is_feasible(deadline):
+                            repairs.append((edits + (edit,), view))
+                        else:
+                            next_frontier.append(edits + (edit,))
+            if len(next_frontier) > max_frontier:
+                complete = False
+            frontier = next_frontier[:max_frontier]
+            if not frontier:
+                break
+    except SearchTimeout:
+        complete = False
+    return repairs, complete
@@ -5,6 +5,7 @@ Converts the tkinter scheduler to a modern web interface
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request, Response, Cookie
 from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from datetime import datetime, time
@@ -13,6 +14,8 @@ import pandas as pd
 import re
 from collections import defaultdict
 import json
+import hashlib
+import weakref
 import os
 from pathlib import Path
 import io
@@ -23,19 +26,125 @@ import shutil
 import csv
 import uuid
 import asyncio
+import gzip
 from fastapi.responses import StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
 
-app = FastAPI(title="University Timetable Generator", version="1.0.0")
+try:
+    import orjson  # Faster JSON encoding when installed
+except ImportError:
+    orjson = None
+try:
+    import brotli  # Enables br responses when installed
+except ImportError:
+    brotli = None
+
+# Response layer: fast JSON encoding and negotiated compression
+COMPRESS_MIN_BYTES = 1024  # Smaller bodies are sent as-is
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "text/")
+
+def encode_json(payload):
+    """Serialize a response payload with orjson, or the stdlib json module when orjson is missing"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=jsonable_encoder,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered through encode_json; the app's default response class"""
+    def render(self, content):
+        return encode_json(content)
+
+def negotiate_encoding(headers):
+    """Content coding to use from Accept-Encoding: br (when brotli is installed), then gzip, else None"""
+    accepted = {}
+    for part in headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for coding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return None
+
+def compress_body(body, coding):
+    if coding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+class CompressionMiddleware:
+    """Compress whole response bodies of at least minimum_size with the negotiated content coding.
+    Streamed responses and responses that already carry a Content-Encoding (cached compressed
+    bodies) pass through untouched."""
+
+    def __init__(self, app, minimum_size=COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        coding = negotiate_encoding(Headers(scope=scope)) if scope["type"] == "http" else None
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        pending_start = None
+
+        async def send_compressed(message):
+            nonlocal pending_start
+            if message["type"] == "http.response.start":
+                pending_start = message  # Held back until the body shows whether to compress
+                return
+            if pending_start is None:
+                await send(message)
+                return
+            start, pending_start = pending_start, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if (message["type"] != "http.response.body" or message.get("more_body", False)
+                    or "content-encoding" in headers or len(body) < self.minimum_size
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)):
+                await send(start)
+                await send(message)
+                return
+            body = compress_body(body, coding)
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"  # Same content, different bytes
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+app = FastAPI(title="University Timetable Generator", version="1.0.0", default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware)
 
 # Setup templates
 templates = Jinja2Templates(directory="templates")
+# Scripts shared by the pages, such as the compact results decoder
+app.mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")), name="static")
 
 # Import OLSSS functionality
 from olsss_main import register_olsss_routes
 
 # Session-based TimetableGenerator management
-session_store = {}  # In-memory dictionary for session data
+from session_manager import SessionStore, estimate_size
+SESSION_MAX_COUNT = int(os.environ.get("SESSION_MAX_COUNT", 500))               # Sessions kept at once
+SESSION_MAX_BYTES = int(os.environ.get("SESSION_MAX_MB", 2048)) * 1024 * 1024  # Byte budget across sessions
+SESSION_IDLE_SECONDS = int(os.environ.get("SESSION_IDLE_MINUTES", 120)) * 60   # Idle time before a session expires
+session_store = SessionStore(lambda: TimetableGenerator(), SESSION_MAX_COUNT, SESSION_MAX_BYTES, SESSION_IDLE_SECONDS)
 SESSION_COOKIE = "session_id"
+RESULT_FORMATS = ("full", "compact")  # compact: shared sections table + timetables as section id arrays
+MAX_REPAIR_EDITS = 3                  # Repair search is exponential in the number of edits combined
+MAX_REPAIR_SUGGESTIONS = 50
 
 def get_session_id(session_id: str = None):
     if session_id is None:
@@ -43,9 +152,86 @@ def get_session_id(session_id: str = None):
     return session_id
 
 def get_generator(session_id):
-    if session_id not in session_store:
-        session_store[session_id] = TimetableGenerator()
-    return session_store[session_id]
+    return session_store.get(session_id)
+
+def check_result_format(result_format):
+    """Reject unknown result formats before anything is rendered or cached for them"""
+    if result_format not in RESULT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{result_format}'. Use one of: {', '.join(RESULT_FORMATS)}")
+
+def timetables_payload(generator, result_format):
+    """Response fields for the stored timetables in the requested result format"""
+    check_result_format(result_format)
+    if result_format == "compact":
+        return {"format": "compact", **generator.compact_valid_combinations()}
+    return {"timetables": generator.format_valid_combinations()}
+
+def etag_matches(request, etag):
+    """If-None-Match check, using the weak comparison conditional GETs call for"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (candidate.strip().removeprefix("W/") for candidate in header.split(","))
+
+def cached_body_response(request, cache, cache_key, build_payload, cache_control):
+    """Serve a JSON body serialized once per cache entry and compressed once per content coding.
+    The strong ETag names the exact bytes sent, so conditional GETs of an unchanged body get 304."""
+    cached = cache.get(cache_key)
+    if cached is None:
+        body = encode_json(build_payload())
+        cached = (hashlib.sha256(body).hexdigest()[:32], body, {})
+        cache[cache_key] = cached
+    digest, body, compressed = cached
+    coding = negotiate_encoding(request.headers) if len(body) >= COMPRESS_MIN_BYTES else None
+    etag = f'"{digest}-{coding}"' if coding else f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if coding:
+        if coding not in compressed:
+            compressed[coding] = compress_body(body, coding)
+        body = compressed[coding]
+        headers["Content-Encoding"] = coding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def cached_results_response(request, generator, session_id, cache_key, build_payload):
+    """Serve a results body rendered once per result version; unchanged polls get 304"""
+    result = cached_body_response(request, generator.rendered_results, cache_key, build_payload, "private, no-cache")
+    result.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    return result
+
+def bounded_int(data, name, default, maximum):
+    """Integer request field of at least 1, clamped to maximum; a value that is not a number is a 400"""
+    value = data.get(name, default)
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        value = int(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"{name} must be a whole number")
+    if value < 1:
+        raise HTTPException(status_code=400, detail=f"{name} must be at least 1")
+    return min(value, maximum)
+
+async def optional_json_object(request):
+    """JSON object body of a request whose body is optional; anything but an object is a 400"""
+    try:
+        data = await request.json()
+    except Exception:
+        return {}
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    return data
+
+def json_response(session_id, payload):
+    """Encode a large payload directly, skipping FastAPI's jsonable_encoder pass, and set the session cookie"""
+    result = FastJSONResponse(content=payload)
+    result.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    return result
 
 # Register OLSSS routes
 register_olsss_routes(app, templates)
@@ -53,6 +239,40 @@ register_olsss_routes(app, templates)
 # Import the file processor function
 from progress_archive.file_processor import process_uploaded_file, extract_section_type
 
+# Search engine: conflict bitsets and the search planner
+from timetable_engine import (build_section_rows, build_too_close, building_of, plan_search, repair_search, run_plan,
+                              rows_overlap, rows_within_limits, to_minutes, SearchSpace, SearchTimeout, SectionFeatures, DAY_INDEX, DAY_NAMES, PREFERENCES,
+                              STRATEGIES)
+
+# Catalog lookup indexes built at catalog load
+from catalog_index import (CourseSearchIndex, SectionIntervalIndex, ALL_DAYS, DAY_MINUTES, QUERY_PAGE_SIZE,
+                           QUERY_MAX_PAGE_SIZE, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE)
+
+# Catalog structures built once per source file and shared read-only by every session that loads it
+SHARED_CATALOG_ATTRIBUTES = ("course_data", "section_rows", "section_features", "section_keys", "section_ids",
+                             "section_fragments", "section_wire", "catalog_courses", "course_sections",
+                             "course_search", "section_times", "catalog_version", "catalog_payloads")
+shared_catalogs = weakref.WeakValueDictionary()  # Source file digest -> SharedCatalog, while any session uses it
+
+class SharedCatalog:
+    """Everything derived from one catalog file. Sessions hold references to it and never modify it,
+    so each file is parsed and indexed once however many sessions load it."""
+    def __init__(self, digest, generator):
+        self.digest = digest
+        for name in SHARED_CATALOG_ATTRIBUTES:
+            setattr(self, name, getattr(generator, name))
+        self.footprint = None  # Estimated bytes, measured once for the session store
+
+# Session memory accounting: results can be generated again, selections cannot, shared catalogs count once
+RESULT_ATTRIBUTES = ("valid_combinations", "combination_alternatives", "_search_space_cache", "_catalog_space_cache",
+                     "_too_close_index", "last_conflict_core", "last_repairs")
+FOOTPRINT_EXCLUDED = set(RESULT_ATTRIBUTES + SHARED_CATALOG_ATTRIBUTES
+                         + ("catalog", "rendered_results", "too_close", "_too_close_footprint", "_results_footprint"))
+
+def body_bytes(cache):
+    """Bytes of the encoded and compressed bodies in a cached_body_response cache"""
+    return sum(len(body) + sum(map(len, compressed.values())) for _, body, compressed in cache.values())
+
 class TimetableGenerator:   
     def __init__(self):
         self.course_data = None
@@ -60,6 +280,36 @@ class TimetableGenerator:
         self.valid_combinations = []
         self.current_file_path = None
         
+        # Search engine data
+        self.section_rows = {}              # (course, section) -> meeting rows in minutes
+        self.section_features = None        # Per-section feature vectors for batch scoring
+        self.section_keys = []              # Section id -> (course, section); valid_combinations store these ids
+        self.section_ids = {}               # (course, section) -> section id
+        self.section_fragments = []         # Section id -> (course entry, [(day, schedule entry), ...]) for display
+        self.section_wire = []              # Section id -> course entry with (day, time slot) meetings for format=compact
+        self.catalog_courses = []           # Course list served by /catalog
+        self.course_sections = {}           # Course code -> section summaries (section, title, instructor, times)
+        self.course_search = None           # Code trie and title/instructor token index for /courses/search
+        self.section_times = None           # Per-weekday meeting interval index for /sections/query
+        self.catalog_version = None         # Content hash of the course list; /status reports it
+        self.catalog_payloads = {}          # Cache key -> (digest, body, compressed bodies) for the loaded catalog
+        self.catalog = None                 # SharedCatalog the attributes above refer to
+        self.last_plan = None               # Plan chosen by the planner for the last generation
+        self.combination_alternatives = []  # Equivalent sections per combination when results are collapsed
+        self.last_conflict_core = None      # Why the last generation found nothing, if it could be shown
+        self.last_repairs = None            # Smallest selection changes that would make it schedulable
+        self.time_blocks = ()               # Personal blocked windows as (day indices, start minute, end minute)
+        self.hard_limits = {}               # Keyword arguments for SearchSpace.limited (minutes, day counts)
+        self.travel_times = {}              # (building, building) -> minutes needed to get between them
+        self.too_close = frozenset()        # Section pairs that follow each other too closely for the walk
+        self._too_close_index = None        # (too_close, section key -> keys too close to it)
+        self._search_space_cache = None     # (selection key, compiled groups and space) for the current selection
+        self._catalog_space_cache = None    # Same, with every catalog section of the evaluated courses (feasible_options)
+        self.result_version = 0             # Bumped whenever valid_combinations (or the catalog behind them) changes
+        self.rendered_results = {}          # Cache key -> (digest, body, compressed bodies) for the current result version
+        self._too_close_footprint = None    # (too_close id, estimated bytes) of the travel-time conflicts
+        self._results_footprint = None      # ((result version, cache ids), estimated bytes) of the results
+        
         # STEP 1: Auto-Course Pairing Data
         self.course_pairs = {}              # Bidirectional pairs: {"CS 101": "CS 101L", "CS 101L": "CS 101"}
         
@@ -78,6 +328,7 @@ class TimetableGenerator:
         # Elective course categories
         self.elective_categories = {} # e.g., {"NS Elective": ["BIO 101", "PHY 101"]}
         self.course_assignments = {} # e.g., {"BIO 101": "NS Elective", "CS 101": "core"}
+        self.elective_requirements = {} # e.g., {"Humanities": 2} -> pick 2 courses (default 1)
         
         # 🎯 AUTO-LOAD CSV ON STARTUP
         self.load_embedded_data()
@@ -85,43 +336,92 @@ class TimetableGenerator:
     def load_data(self, file_content: bytes, filename: str):
         """Load course data from CSV or Excel file content"""
         try:
-            # Load the original data
-            if filename.endswith('.csv'):
-                original_df = pd.read_csv(io.StringIO(file_content.decode('utf-8')))
-            else:
-                original_df = pd.read_excel(io.BytesIO(file_content))
+            def read_original():
+                if filename.endswith('.csv'):
+                    return pd.read_csv(io.StringIO(file_content.decode('utf-8')))
+                return pd.read_excel(io.BytesIO(file_content))
             
+            self._load_catalog(file_content, read_original)
+            self.current_file_path = filename
+            
+            # STEP 1 & 2: Auto-detect course pairs and section pairings
+            self.auto_detect_course_pairs()
+            
+            return True
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            return False
+    
+    def _load_catalog(self, file_content, read_original):
+        """Use the shared catalog built from this file content, processing the file only if no
+        session has it loaded. read_original returns the file as a DataFrame."""
+        digest = hashlib.sha256(file_content).hexdigest()[:16]
+        catalog = shared_catalogs.get(digest)
+        if catalog is not None:
+            print(f"♻️ Reusing catalog {catalog.catalog_version} already loaded by another session")
+        else:
             # Process the data using the integrated processor
             print("Running file processor to split courses with multiple section types...")
-            processed_df, split_courses = process_uploaded_file(original_df)
-            
-            # Use the processed data
+            processed_df, split_courses = process_uploaded_file(read_original())
             self.course_data = processed_df
             
-            self.current_file_path = filename
             # Clean and validate data
             self._clean_data()
-            
-            # STEP 1 & 2: Auto-detect course pairs and section pairings
-            self.auto_detect_course_pairs()
+            catalog = shared_catalogs[digest] = SharedCatalog(digest, self)
             
             # Log processing results
             if split_courses:
                 print(f"File processing complete. {len(split_courses)} courses were split.")
             else:
                 print("File processing complete. No courses needed splitting.")
-            
-            return True
-        except Exception as e:
-            print(f"Error loading data: {e}")
-            return False
-    
+        self._use_catalog(catalog)
+
+    def _use_catalog(self, catalog):
+        """Point this session at a shared catalog and reset what depended on the previous one"""
+        self.catalog = catalog
+        for name in SHARED_CATALOG_ATTRIBUTES:
+            setattr(self, name, getattr(catalog, name))
+        self.too_close = build_too_close(self.course_data, self.travel_times)
+        self._search_space_cache = None
+        self._catalog_space_cache = None
+        # Stored results hold section ids of the previous catalog, so they go with it
+        self.valid_combinations = []
+        self.combination_alternatives = []
+        self.last_plan = None
+        self.last_conflict_core = None
+        self.last_repairs = None
+        self._results_changed()
+
     def clear_data(self):
         """Clear all loaded data and selections including smart features"""
         self.course_data = None
         self.selected_courses = {}
         self.valid_combinations = []
         self.current_file_path = None
+        self.section_rows = {}
+        self.section_features = None
+        self.section_keys = []
+        self.section_ids = {}
+        self.section_fragments = []
+        self.section_wire = []
+        self.catalog_courses = []
+        self.course_sections = {}
+        self.course_search = None
+        self.section_times = None
+        self.catalog_version = None
+        self.catalog_payloads = {}
+        self.catalog = None
+        self.last_plan = None
+        self.combination_alternatives = []
+        self.last_conflict_core = None
+        self.last_repairs = None
+        self.time_blocks = ()
+        self.hard_limits = {}
+        self.travel_times = {}
+        self.too_close = frozenset()
+        self._search_space_cache = None
+        self._catalog_space_cache = None
+        self._results_changed()
         
         # Clear smart features data
         self.course_pairs = {}
@@ -132,6 +432,7 @@ class TimetableGenerator:
         # Clear elective categories
         self.elective_categories = {}
         self.course_assignments = {}
+        self.elective_requirements = {}
         
         # Clear legacy data
         self.section_pairs = {}
@@ -142,9 +443,12 @@ class TimetableGenerator:
         """Clear only the selected courses roster (keep smart features)"""
         self.selected_courses = {}
         self.valid_combinations = []
+        self.combination_alternatives = []
+        self._results_changed()
         # Also clear elective categories since they reference courses
         self.elective_categories = {}
         self.course_assignments = {}
+        self.elective_requirements = {}
     
     def _clean_data(self):
         """Clean and standardize the course data"""
@@ -179,6 +483,138 @@ class TimetableGenerator:
         # Create unique identifiers
         self.course_data['Course_Section'] = self.course_data['Course Code'] + ' ' + self.course_data['Section']
         
+        # Index meeting times per section for the search engine
+        self.section_rows = build_section_rows(self.course_data)
+        self.section_features = SectionFeatures(self.section_rows)
+        self.section_keys = list(self.section_rows)
+        self.section_ids = {key: section_id for section_id, key in enumerate(self.section_keys)}
+        records = self.course_data.to_dict('records')
+        self._build_section_fragments(records)
+        self._build_catalog(records)
+
+    def _results_changed(self):
+        """Start a new result version; bodies rendered for the previous one are dropped"""
+        self.result_version += 1
+        self.rendered_results = {}
+
+    def memory_footprint(self):
+        """(bytes kept, bytes release_results would free, (shared catalog digest, its bytes) or None),
+        estimated for the session store. The shared catalog is measured once, results once per result version."""
+        catalog = [getattr(self, name) for name in SHARED_CATALOG_ATTRIBUTES]
+        shared = None
+        if self.catalog is not None:
+            if self.catalog.footprint is None:
+                self.catalog.footprint = estimate_size(*catalog)
+            shared = (self.catalog.digest, self.catalog.footprint + body_bytes(self.catalog.catalog_payloads))
+        if self._too_close_footprint is None or self._too_close_footprint[0] != id(self.too_close):
+            self._too_close_footprint = (id(self.too_close), estimate_size(self.too_close, shared=catalog))
+        results_key = (self.result_version, id(self._search_space_cache), id(self._catalog_space_cache),
+                       id(self._too_close_index))
+        if self._results_footprint is None or self._results_footprint[0] != results_key:
+            results = [getattr(self, name) for name in RESULT_ATTRIBUTES if getattr(self, name)]
+            self._results_footprint = (results_key, estimate_size(*results, shared=catalog))
+        selections = estimate_size(*(value for name, value in vars(self).items() if name not in FOOTPRINT_EXCLUDED),
+                                   shared=catalog)
+        # Rendered bodies change within a result version and are cheap to count exactly
+        releasable = self._results_footprint[1] + body_bytes(self.rendered_results)
+        return self._too_close_footprint[1] + selections, releasable, shared
+
+    def release_results(self):
+        """Drop generated timetables and the caches behind them to free memory.
+        The catalog and selections stay, so the timetables can be generated again."""
+        self.valid_combinations = []
+        self.combination_alternatives = []
+        self._search_space_cache = None
+        self._catalog_space_cache = None
+        self._too_close_index = None
+        self.last_conflict_core = None
+        self.last_repairs = None
+        self._results_changed()
+        
+    def _build_catalog(self, records):
+        """Course list and per-course section summaries in one pass over the catalog rows.
+        /catalog serves the course list, versioned by a hash of its content."""
+        titles = {}
+        sections_by_course = defaultdict(dict)
+        for row in records:
+            course_code, section = row['Course Code'], row['Section']
+            titles.setdefault(course_code, row.get('Title', 'No Title'))
+            summary = sections_by_course[course_code].get(section)
+            if summary is None:
+                summary = sections_by_course[course_code][section] = {
+                    'section': section,
+                    'title': row['Title'],
+                    'instructor': row['Instructor / Sponsor'],
+                    'times': []
+                }
+            summary['times'].append(f"{row['Day']} {row['Start']}-{row['End']}")
+
+        self.catalog_courses = [
+            {'code': course_code, 'title': titles[course_code], 'display': f"{course_code} - {titles[course_code]}"}
+            for course_code in sorted(titles)
+        ]
+        self.course_sections = {course_code: list(sections.values()) for course_code, sections in sections_by_course.items()}
+        self.course_search = CourseSearchIndex(self.catalog_courses, self.course_sections)
+        self.section_times = SectionIntervalIndex(
+            self.section_rows,
+            [course_entry['instructor'] for course_entry, _ in self.section_fragments],
+            [[slot['location'] for slot in course_entry['time_slots']] for course_entry, _ in self.section_fragments]
+        )
+        self.catalog_version = hashlib.sha256(encode_json(self.catalog_courses)).hexdigest()[:16]
+        self.catalog_payloads = {}
+
+    def _build_section_fragments(self, records):
+        """Build every section's formatted course entry and per-day schedule entries once.
+        format_combination only assembles references to these shared, read-only objects;
+        section_wire holds the same entry with meetings as [day, time slot index] for format=compact."""
+        rows_by_section = defaultdict(list)
+        for row in records:
+            rows_by_section[(row['Course Code'], row['Section'])].append(row)
+
+        self.section_fragments = []
+        self.section_wire = []
+        for course_code, section in self.section_keys:
+            rows = rows_by_section[(course_code, section)]
+            title = rows[0]['Title'] if rows else "Unknown Title"
+            instructor = rows[0]['Instructor / Sponsor'] if rows else "Unknown Instructor"
+            display_code = self.format_course_code_for_display(course_code)
+            time_slots = []
+            schedule_entries = []
+            meetings = []
+            for row in rows:
+                # Try multiple possible column names for location
+                location = row.get('Room', row.get('Location', 'TBA'))
+                time_slots.append({
+                    'day': row['Day'],
+                    'start_time': row['Start'],
+                    'end_time': row['End'],
+                    'location': location
+                })
+                # Parse days (handle TTh, MW, etc.)
+                days_list = row.get('Days_List', []) or self._parse_days(row['Day'])
+                for parsed_day in days_list:
+                    if parsed_day in DAY_INDEX:
+                        meetings.append([parsed_day, len(time_slots) - 1])
+                        schedule_entries.append((parsed_day, {
+                            'course': display_code,
+                            'section': section,
+                            'title': title,
+                            'instructor': instructor,
+                            'room': location,
+                            'start': row['Start'],
+                            'end': row['End'],
+                            'time': f"{row['Start']} - {row['End']}"
+                        }))
+            course_entry = {
+                'course_code': display_code,
+                'section': section,
+                'title': title,
+                'instructor': instructor,
+                'time_slots': time_slots
+            }
+            self.section_fragments.append((course_entry, tuple(schedule_entries)))
+            self.section_wire.append({**course_entry, 'meetings': meetings})
+
     def _convert_to_24h(self, time_str):
         """Convert time string to 24-hour format"""
         try:
@@ -326,55 +762,62 @@ class TimetableGenerator:
         return sorted(self.course_data['Course Code'].unique())
     
     def get_courses_with_titles(self):
-        """Get list of unique courses with their titles"""
-        if self.course_data is None:
-            return []
-        
-        # Get unique course codes with their titles
-        course_info = []
-        for course_code in sorted(self.course_data['Course Code'].unique()):
-            # Get the first occurrence to extract the title
-            course_row = self.course_data[self.course_data['Course Code'] == course_code].iloc[0]
-            title = course_row.get('Title', 'No Title')
-            course_display = f"{course_code} - {title}"
-            course_info.append({
-                'code': course_code,
-                'title': title,
-                'display': course_display
-            })
-        return course_info
+        """Get list of unique courses with their titles (built at catalog load)"""
+        return self.catalog_courses
+    
+    def search_courses(self, query, offset=0, limit=SEARCH_PAGE_SIZE):
+        """(total matches, one page of catalog courses) ranked by code prefix, title words and instructors"""
+        if self.course_search is None:
+            return 0, []
+        return self.course_search.search(query, offset, limit)
+    
+    def query_sections(self, days=None, start=None, end=None, instructor=None, room=None, mode="meets",
+                       offset=0, limit=QUERY_PAGE_SIZE):
+        """Catalog sections with a meeting inside a time window on the given days ("meets"), or with
+        every meeting inside it ("fits"), optionally filtered by instructor and room text.
+        Returns (result, None) or (None, error message)."""
+        if mode not in ("meets", "fits"):
+            return None, "mode must be 'meets' or 'fits'"
+        day_mask = ALL_DAYS
+        if days:
+            day_mask = 0
+            for part in str(days).split(','):
+                part = part.strip()
+                names = [part.capitalize()] if part.capitalize() in DAY_INDEX else self._parse_days(part)
+                for day in names:
+                    day_mask |= 1 << DAY_INDEX[day]
+            if not day_mask:
+                return None, f"Unknown days '{days}'. Use names like Tuesday or patterns like MW and TTh"
+        window = []
+        for name, value, default in (("start", start, 0), ("end", end, DAY_MINUTES)):
+            if value is None or value == "":
+                window.append(default)
+                continue
+            minutes = to_minutes(self._convert_to_24h(value))
+            if minutes is None:
+                return None, f"Invalid {name} time: {value}"
+            window.append(minutes)
+        if window[0] >= window[1]:
+            return None, "The time window must end after it starts"
+
+        section_ids = []
+        if self.section_times is not None:
+            section_ids = self.section_times.query(day_mask, window[0], window[1], instructor, room, mode == "fits")
+        return {
+            "total": len(section_ids),
+            "sections": [self.section_fragments[section_id][0] for section_id in section_ids[offset:offset + limit]]
+        }, None
     
     def get_course_sections(self, course_code):
-        """Get all sections for a specific course"""
-        if self.course_data is None:
-            return []
-        
-        course_sections = self.course_data[self.course_data['Course Code'] == course_code]
-        sections_info = []
-        
-        for section in course_sections['Section'].unique():
-            section_data = course_sections[course_sections['Section'] == section]
-            
-            # Group by section to handle multiple time slots
-            times = []
-            for _, row in section_data.iterrows():
-                time_info = f"{row['Day']} {row['Start']}-{row['End']}"
-                times.append(time_info)
-            
-            instructor = section_data['Instructor / Sponsor'].iloc[0]
-            title = section_data['Title'].iloc[0]
-            
-            sections_info.append({
-                'section': section,
-                'title': title,
-                'instructor': instructor,
-                'times': times,
-                'data': section_data,
-                'is_paired': self.is_section_paired(course_code, section),
-                'paired_with': self.get_paired_sections(course_code, section)
-            })
-        
-        return sections_info
+        """Get all sections for a specific course, with this session's pairing flags overlaid"""
+        return [
+            {
+                **summary,
+                'is_paired': self.is_section_paired(course_code, summary['section']),
+                'paired_with': self.get_paired_sections(course_code, summary['section'])
+            }
+            for summary in self.course_sections.get(course_code, ())
+        ]
     
     def _check_time_conflict(self, course1_data, course2_data, debug=False):
         """Check if two courses have time conflicts"""
@@ -492,7 +935,8 @@ class TimetableGenerator:
                 if self._is_valid_combination(flattened_combination):
                     valid_combinations.append(flattened_combination)
         
-        self.valid_combinations = valid_combinations
+        self.valid_combinations = [self._combination_ids(c) for c in valid_combinations]
+        self._results_changed()
         return valid_combinations    
 
     
@@ -536,7 +980,8 @@ class TimetableGenerator:
                     break
         
         print(f"✅ Found {len(valid_combinations)} valid combinations from {combinations_checked} checked")
-        self.valid_combinations = valid_combinations
+        self.valid_combinations = [self._combination_ids(c) for c in valid_combinations]
+        self._results_changed()
         return valid_combinations
 
     def _is_valid_combination_optimized(self, combination):
@@ -586,55 +1031,527 @@ class TimetableGenerator:
         
         return False
 
-    def generate_combinations_smart_limit(self, max_combinations=300, max_time_seconds=50):
-        """Generate combinations with smart limits"""
+    def generate_combinations_smart_limit(self, max_combinations=300, max_time_seconds=50, preferences=None, strategy=None,
+                                          collapse_equivalent=False, seed=None):
+        """Generate combinations with smart limits, letting the planner pick the search engine.
+        With collapse_equivalent, sections with identical meeting patterns are shown once per timetable.
+        seed makes the sampling engines reproducible."""
         start_time = time_module.time()
+        self.valid_combinations = []
+        self.last_plan = None
+        self.combination_alternatives = []
+        self.last_conflict_core = None
+        self.last_repairs = None
+        self._results_changed()
         
         if not self.selected_courses:
             return []
         
-        filtered_course_options = self._prefilter_course_options()
+        filtered_course_options, group_labels, _, space = self._get_search_space()
         if not filtered_course_options:
             return []
         
-        valid_combinations = []
-        combinations_checked = 0
-        
-        for combination in itertools.product(*filtered_course_options):
-            # Time limit check
-            if time_module.time() - start_time > max_time_seconds:
-                print(f"⏰ Time limit reached ({max_time_seconds}s), stopping search...")
-                break
-            
-            # Combination limit check
-            if len(valid_combinations) >= max_combinations:
-                print(f"🎯 Found {max_combinations} combinations, stopping search...")
-                break
-            
-            combinations_checked += 1
-            
-            flattened_combination = []
-            for unit in combination:
-                flattened_combination.extend(unit)
-            
-            if self._is_valid_combination_optimized(flattened_combination):
-                valid_combinations.append(flattened_combination)
+        # Plan on the compiled conflict bitsets before searching
+        plan = plan_search(space, preferences, max_combinations, strategy,
+                           [self.format_course_code_for_display(label) for label in group_labels])
+        plan['blocked_windows'] = len(self.time_blocks)
+        plan['hard_limits'] = dict(self.hard_limits)
+        print(f"🧭 Plan: {plan['strategy']} ({plan['reason']}), "
+              f"raw product {plan['raw_product']}, pruned {plan['pruned_product']}")
+        
+        solutions = run_plan(space, plan, max_combinations, start_time + max_time_seconds, preferences,
+                             seed=seed, collapse=collapse_equivalent)
+        valid_combinations = [
+            tuple(self.section_ids[key] for key in space.solution_sections(solution)) for solution in solutions
+        ]
+        if collapse_equivalent:
+            self.combination_alternatives = [space.alternatives(solution) for solution in solutions]
+        
+        # Nothing found: explain which courses cannot be scheduled together
+        if not valid_combinations:
+            core = space.conflict_core()
+            if core is not None:
+                self.last_conflict_core = self._describe_conflict_core(space, core, group_labels)
+                print(f"🧩 Conflict core: {', '.join(self.last_conflict_core['courses'])}")
+                self.last_repairs = self.repair_suggestions()
+                print(f"🔧 {len(self.last_repairs['suggestions'])} repair suggestions")
+        
+        plan['found'] = len(valid_combinations)
+        plan['elapsed_seconds'] = round(time_module.time() - start_time, 4)
+        self.last_plan = plan
         
         print(f"✅ Generated {len(valid_combinations)} combinations in {time_module.time() - start_time:.2f}s")
         self.valid_combinations = valid_combinations
+        self._results_changed()
         return valid_combinations
 
+    def _describe_conflict_core(self, space, core, group_labels):
+        """Turn a conflict core from the engine into course names and offending sections"""
+        def section_name(key):
+            return f"{self.format_course_code_for_display(key[0])} {key[1]}"
+        
+        conflicts, total_conflicts = space.explain_core(core)
+        enabled = {uid for members in space.class_members.values() for uid in members}
+        shortfalls = {group_index: (picks, available) for group_index, picks, available in space.member_shortfalls()}
+        return {
+            "courses": [self.format_course_code_for_display(group_labels[g]) for g in core],
+            "sections": {
+                self.format_course_code_for_display(group_labels[g]): [
+                    " + ".join(section_name(key) for key in space.unit_sections[uid])
+                    for uid in space.group_units[g]
+                ]
+                for g in core
+            },
+            "conflicts": [
+                {"sections": [section_name(key1), section_name(key2)], "reason": reason}
+                for key1, key2, reason in conflicts
+            ],
+            "total_conflicts": total_conflicts,
+            # Elective categories that cannot fill their required count whatever the other courses
+            "shortfalls": [
+                f"{self.format_course_code_for_display(group_labels[g])} needs {shortfalls[g][0]} courses "
+                f"but only {shortfalls[g][1]} are available"
+                for g in core if g in shortfalls
+            ],
+            "blocked_sections": [
+                " + ".join(section_name(key) for key in space.unit_sections[uid])
+                for g in core for uid in space.group_units[g]
+                if uid not in enabled and (space.valid_mask >> uid) & 1
+            ]
+        }
+
+    def load_travel_times(self, file_content: bytes):
+        """Load minutes needed between buildings from a CSV of (building, building, minutes) rows.
+        Buildings are room prefixes ("NAC" for "NAC 512"); distances apply in both directions."""
+        travel_times = {}
+        try:
+            for row in csv.reader(io.StringIO(file_content.decode('utf-8'))):
+                if len(row) < 3:
+                    continue
+                try:
+                    minutes = float(row[2])
+                except ValueError:
+                    continue  # Header or malformed row
+                building1, building2 = building_of(row[0]), building_of(row[1])
+                if building1 and building2 and building1 != building2:
+                    travel_times[(building1, building2)] = minutes
+                    travel_times[(building2, building1)] = minutes
+        except UnicodeDecodeError:
+            return False, "Travel time file must be UTF-8 CSV"
+        if not travel_times:
+            return False, "No building distances found. Expected rows of: building, building, minutes"
+        self.travel_times = travel_times
+        self._build_travel_table()
+        return True, f"Loaded {len(travel_times) // 2} building distances; {len(self.too_close)} section pairs are too close."
+
+    def clear_travel_times(self):
+        """Stop treating building changes as conflicts"""
+        self.travel_times = {}
+        self._build_travel_table()
+
+    def _build_travel_table(self):
+        """Precompute the section pairs that are too close to make it between buildings"""
+        if self.course_data is None:
+            self.too_close = frozenset()
+        else:
+            self.too_close = build_too_close(self.course_data, self.travel_times)
+        self._search_space_cache = None
+        self._catalog_space_cache = None
+        print(f"🚶 {len(self.too_close)} section pairs too close to change buildings")
+
+    def set_time_blocks(self, blocked_times):
+        """Replace the student's blocked time windows, given as {"Monday": [["9:00 AM", "12:00 PM"]], ...}"""
+        rows = []
+        blocked_times = blocked_times or {}
+        if not isinstance(blocked_times, dict):
+            return False, 'Blocked times must map weekdays to lists of [start, end] windows, e.g. {"Monday": [["9:00 AM", "12:00 PM"]]}'
+        for day, windows in blocked_times.items():
+            if day not in DAY_INDEX:
+                return False, f"Unknown weekday '{day}'. Use one of: {', '.join(DAY_NAMES)}"
+            if not isinstance(windows, list):
+                return False, f"Blocked windows for {day} must be a list of [start, end] pairs"
+            for window in windows:
+                if not isinstance(window, list) or len(window) != 2:
+                    return False, f"Blocked windows need a start and an end time: {window}"
+                start, end = (to_minutes(self._convert_to_24h(value)) for value in window)
+                if start is None or end is None or start >= end:
+                    return False, f"Invalid blocked window on {day}: {window}"
+                rows.append(((DAY_INDEX[day],), start, end))
+        self.time_blocks = tuple(sorted(rows))
+        return True, f"{len(rows)} blocked window(s) set."
+
+    def set_hard_limits(self, limits):
+        """Replace the hard limits on generated timetables, given as
+        {"max_days": 3, "earliest_start": "9:00 AM", "latest_end": "6:00 PM", "max_daily_hours": 6}"""
+        parsed = {}
+        limits = limits or {}
+        if not isinstance(limits, dict):
+            return False, f"Limits must be an object, e.g. {{\"max_days\": 3}}, not {limits!r}"
+        try:
+            max_days = limits.get("max_days")
+            if max_days is not None:
+                # A whole number of days: 2.7 or true would otherwise be silently truncated
+                if isinstance(max_days, bool) or not isinstance(max_days, (int, float)) or max_days != int(max_days):
+                    return False, f"max_days must be a whole number, not {max_days!r}"
+                parsed["max_days"] = int(max_days)
+                if not 1 <= parsed["max_days"] <= len(DAY_NAMES):
+                    return False, "max_days must be between 1 and 7"
+            if limits.get("max_daily_hours") is not None:
+                if isinstance(limits["max_daily_hours"], bool):
+                    raise TypeError
+                parsed["max_daily_minutes"] = round(float(limits["max_daily_hours"]) * 60)
+                if parsed["max_daily_minutes"] <= 0:
+                    return False, "max_daily_hours must be positive"
+        except (TypeError, ValueError, OverflowError):
+            return False, f"Invalid limits: {limits}"
+        for name in ("earliest_start", "latest_end"):
+            if limits.get(name) is not None:
+                parsed[name] = to_minutes(self._convert_to_24h(limits[name]))
+                if parsed[name] is None:
+                    return False, f"Invalid time for {name}: {limits[name]}"
+        self.hard_limits = parsed
+        return True, f"{len(parsed)} hard limit(s) set."
+
+    def _selection_key(self):
+        """Everything the compiled search space depends on besides the loaded catalog"""
+        return (
+            tuple(sorted((course, tuple(sections)) for course, sections in self.selected_courses.items())),
+            tuple(sorted(self.course_assignments.items())),
+            tuple(sorted(self.elective_requirements.items())),
+            tuple(sorted(self.pair_lookup.items())),
+            self.time_blocks,
+            tuple(sorted(self.hard_limits.items()))
+        )
+
+    def _get_search_space(self):
+        """Prefiltered groups and their compiled search space, cached until the selection changes"""
+        key = self._selection_key()
+        if self._search_space_cache is None or self._search_space_cache[0] != key:
+            self._search_space_cache = (key, self._compile_selection())
+        return self._search_space_cache[1]
+
+    def _get_catalog_search_space(self, course_codes):
+        """Search space offering every catalog section of course_codes, cached until they or the selection change"""
+        key = (self._selection_key(), course_codes)
+        if self._catalog_space_cache is None or self._catalog_space_cache[0] != key:
+            catalog_sections = {
+                course_code: sorted(summary['section'] for summary in self.course_sections.get(course_code, ()))
+                for course_code in course_codes
+            }
+            self._catalog_space_cache = (key, self._compile_selection(catalog_sections))
+        return self._catalog_space_cache[1]
+
+    def _compile_selection(self, selected_courses=None):
+        """(course options, group labels, group picks, space) with blocked windows and hard limits applied"""
+        course_options, group_labels, group_picks = self._prefilter_course_groups(selected_courses)
+        space = self._compile_search_space(course_options, group_picks) if course_options else None
+        if space is not None and self.time_blocks:
+            # Blocked windows remove sections before the search starts, so they shrink the domains
+            space = space.restricted(allowed_units=space.units_clear_of(self.time_blocks))
+        if space is not None and self.hard_limits:
+            space = space.limited(**self.hard_limits)
+        return course_options, group_labels, group_picks, space
+
+    def feasible_options(self, locked=None, courses=(), max_time_seconds=2):
+        """For every selected course that is not locked, split all of its catalog sections into those
+        that still appear in at least one valid timetable and those that cannot be used any more.
+        locked maps course codes to the sections the student has fixed; courses adds catalog
+        courses to evaluate that are not selected yet, such as the one the student is looking at."""
+        locked = locked or {}
+        course_codes = tuple(sorted(
+            course_code for course_code in set(self.selected_courses) | set(courses)
+            if course_code in self.course_sections
+        ))
+        _, _, _, space = self._get_catalog_search_space(course_codes)
+        if space is None:
+            return {"feasible": False, "courses": {}}
+        
+        # Only units that respect the locked sections stay enabled
+        allowed_units = 0
+        for uid, sections in enumerate(space.unit_sections):
+            if all(course not in locked or section in locked[course] for course, section in sections):
+                allowed_units |= 1 << uid
+        view = space.restricted(allowed_units=allowed_units)
+        supported, undecided = view.supported_units(deadline=time_module.time() + max_time_seconds)
+        
+        courses = {
+            course_code: {"possible": [], "impossible": [], "undecided": []}
+            for course_code in course_codes if course_code not in locked
+        }
+        for uid, unit_sections in enumerate(space.unit_sections):
+            if (supported >> uid) & 1:
+                status = "possible"
+            elif (undecided >> uid) & 1:
+                status = "undecided"
+            else:
+                continue
+            for course_code, section in unit_sections:
+                if course_code in courses and section not in courses[course_code][status]:
+                    courses[course_code][status].append(section)
+        for course_code, info in courses.items():
+            known = set(info["possible"]) | set(info["undecided"])
+            info["impossible"] = [summary['section'] for summary in self.course_sections[course_code]
+                                  if summary['section'] not in known]
+        return {"feasible": bool(supported), "courses": courses}
+
+    def repair_suggestions(self, max_edits=2, max_suggestions=10, max_time_seconds=3):
+        """Suggest the smallest changes that make the selection schedulable again:
+        swap a section, add an alternative section, drop a course or lower an elective count."""
+        if not self.selected_courses or self.course_data is None:
+            return {"feasible": False, "suggestions": [], "complete": True}
+        deadline = time_module.time() + max_time_seconds
+        _, _, _, current_space = self._get_search_space()
+        try:
+            if current_space is not None and current_space.is_feasible(deadline):
+                return {"feasible": True, "suggestions": [], "complete": True}
+        except SearchTimeout:
+            return {"feasible": None, "suggestions": [], "complete": False}
+
+        # Compile once with every catalog section of the selected courses; edits only enable units
+        catalog_sections = {
+            course_code: sorted(self.course_data[self.course_data['Course Code'] == course_code]['Section'].unique())
+            for course_code in self.selected_courses
+        }
+        course_options, group_labels, group_picks = self._prefilter_course_groups(catalog_sections)
+        if not course_options:
+            return {"feasible": False, "suggestions": [], "complete": True}
+        space = self._compile_search_space(course_options, group_picks)
+        if self.hard_limits:
+            space = space.limited(**self.hard_limits)
+        clear_units = space.units_clear_of(self.time_blocks) if self.time_blocks else -1
+
+        def apply(edits):
+            selection = {course: set(sections) for course, sections in self.selected_courses.items()}
+            picks = list(group_picks)
+            for edit in edits:
+                if edit[0] == "drop":
+                    for course_code in edit[1]:
+                        selection[course_code] = set()
+                        if course_code in group_labels:
+                            picks[group_labels.index(course_code)] = 0
+                elif edit[0] == "swap":
+                    selection[edit[1]] = (selection[edit[1]] - {edit[2]}) | {edit[3]}
+                elif edit[0] == "add":
+                    selection[edit[1]].add(edit[2])
+                elif edit[0] == "require":
+                    picks[group_labels.index(edit[1])] = edit[2]
+            return selection, picks
+
+        def view_for(edits):
+            selection, picks = apply(edits)
+            allowed_units = 0
+            for uid, sections in enumerate(space.unit_sections):
+                if all(course not in selection or section in selection[course] for course, section in sections):
+                    allowed_units |= 1 << uid
+            return space.restricted(group_picks=picks, allowed_units=allowed_units & clear_units)
+
+        def candidate_edits(group_index, edits):
+            selection, picks = apply(edits)
+            label = group_labels[group_index]
+            touched = {edit[1] for edit in edits if edit[0] == "swap"}
+            if self.course_assignments.get(label, "core") == "core" and label in self.selected_courses:
+                courses = [label]
+                dropped = [label]
+                paired = self.course_pairs.get(label)
+                if paired in self.selected_courses and self.course_assignments.get(paired, "core") == "core":
+                    dropped.append(paired)
+                yield ("drop", tuple(sorted(dropped)))
+            else:
+                courses = [c for c in self.selected_courses if self.course_assignments.get(c) == label]
+                if picks[group_index] > 1:
+                    yield ("require", label, picks[group_index] - 1)
+            for course_code in courses:
+                chosen = self.selected_courses[course_code]
+                for section in catalog_sections[course_code]:
+                    if section in selection[course_code]:
+                        continue
+                    if len(chosen) == 1 and course_code not in touched:
+                        yield ("swap", course_code, chosen[0], section)
+                    elif len(chosen) != 1:
+                        yield ("add", course_code, section)
+
+        repairs, complete = repair_search(view_for, candidate_edits, max_edits, deadline)
+
+        suggestions = []
+        for edits, view in repairs:
+            count, exact = view.count_solutions(limit=1000, deadline=time_module.time() + 0.05)
+            suggestions.append({
+                "distance": len(edits),
+                "edits": [self._describe_edit(edit) for edit in edits],
+                "timetables": count,
+                "count_exact": exact,
+                "_drops": sum(1 for edit in edits if edit[0] in ("drop", "require"))
+            })
+        # Fewest edits first, keeping every course where possible, then the most timetables
+        suggestions.sort(key=lambda item: (item["distance"], item["_drops"], -item["timetables"]))
+        for item in suggestions:
+            del item["_drops"]
+        return {"feasible": False, "suggestions": suggestions[:max_suggestions], "complete": complete}
+
+    def _describe_edit(self, edit):
+        """Readable form of a repair edit"""
+        if edit[0] == "drop":
+            courses = [self.format_course_code_for_display(code) for code in edit[1]]
+            return {"action": "drop", "courses": courses, "text": f"Drop {' + '.join(courses)}"}
+        if edit[0] == "require":
+            return {"action": "require", "category": edit[1], "required_count": edit[2],
+                    "text": f"Require {edit[2]} course(s) from {edit[1]}"}
+        course = self.format_course_code_for_display(edit[1])
+        if edit[0] == "swap":
+            return {"action": "swap", "course": course, "from": edit[2], "to": edit[3],
+                    "text": f"Swap {course} {edit[2]} for {edit[3]}"}
+        return {"action": "add", "course": course, "section": edit[2],
+                "text": f"Add {course} {edit[2]}"}
+
+    def timetable_neighbors(self, index):
+        """Valid timetables that differ from valid_combinations[index] in exactly one section
+        (or one atomic unit of paired sections). Returns None if there is no such timetable."""
+        if not 0 <= index < len(self.valid_combinations):
+            return None
+        _, group_labels, _, space = self._get_search_space()
+        if space is None:
+            return None
+        solution = space.solution_units(self.section_keys[section_id] for section_id in self.valid_combinations[index])
+        if solution is None:
+            return None  # Selection changed since the timetables were generated
+
+        def unit_name(uid):
+            return " + ".join(
+                f"{self.format_course_code_for_display(course_code)} {section}"
+                for course_code, section in space.unit_sections[uid]
+            )
+
+        neighbors = []
+        for position, replacement in space.neighbors(solution):
+            neighbor = solution[:position] + (replacement,) + solution[position + 1:]
+            neighbors.append({
+                "group": self.format_course_code_for_display(group_labels[space.units[replacement][0]]),
+                "from": unit_name(solution[position]),
+                "to": unit_name(replacement),
+                "timetable": self.format_combination(
+                    [self.section_ids[key] for key in space.solution_sections(neighbor)])
+            })
+        return neighbors
+
+    def fill_gaps(self, index):
+        """Catalog courses with a section that fits into the free time of valid_combinations[index]:
+        no overlap, blocked window, travel-time clash or broken hard limit. A section paired through
+        pair_lookup only fits together with the sections paired to it, and a course paired through
+        course_pairs only counts together with a compatible partner section that fits as well.
+        Returns None if there is no such timetable."""
+        if not 0 <= index < len(self.valid_combinations):
+            return None
+        taken = dict(self.section_keys[section_id] for section_id in self.valid_combinations[index])
+        taken_rows = [row for key in taken.items() for row in self.section_rows[key]]
+
+        # Occupancy and limits for the whole catalog at once, then the travel-time conflicts
+        fits = (self.section_features.clear_of(taken_rows + list(self.time_blocks))
+                & self.section_features.within_limits(taken_rows, **self.hard_limits))
+        too_close = self._too_close_partners()
+        for key in taken.items():
+            for other in too_close.get(key, ()):
+                fits[self.section_ids[other]] = False
+
+        fitting = defaultdict(list)
+        for section_id in fits.nonzero()[0].tolist():
+            course_code, section = self.section_keys[section_id]
+            if course_code not in taken:
+                fitting[course_code].append(section)
+        fitting_keys = {(course_code, section) for course_code, sections in fitting.items() for section in sections}
+
+        def unit(course_code, section):
+            # The section with the sections it must be taken with, as the search space builds it
+            keys = [(course_code, section)] + self.get_paired_sections(course_code, section)
+            if all(key in fitting_keys for key in keys) and self._unit_fits(taken, taken_rows, keys):
+                return keys
+            return None
+
+        courses = []
+        for course_code in sorted(fitting):
+            partner = self.course_pairs.get(course_code)
+            sections = []
+            for section in fitting[course_code]:
+                keys = unit(course_code, section)
+                if keys is None:
+                    continue
+                if partner is None or partner in taken or any(key[0] == partner for key in keys):
+                    sections.append(section)
+                elif any(partner_keys is not None and self._unit_fits(taken, taken_rows, keys + partner_keys)
+                         for partner_keys in (unit(partner, other) for other in fitting.get(partner, ()))):
+                    sections.append(section)
+            if sections:
+                courses.append({
+                    "course_code": self.format_course_code_for_display(course_code),
+                    "title": self.course_sections[course_code][0]['title'],
+                    "sections": sections,
+                    "paired_with": self.format_course_code_for_display(partner) if partner else None
+                })
+        return courses
+
+    def _unit_fits(self, taken, taken_rows, keys):
+        """Can sections that each fit the timetable alone be added together, by the search space's
+        pairwise rule (one section per course, no overlap, travel time, pairing) and the hard limits"""
+        courses = [course_code for course_code, _ in keys]
+        if len(set(courses)) < len(courses) or any(course_code in taken for course_code in courses):
+            return False
+        for i, key1 in enumerate(keys):
+            for key2 in keys[i + 1:]:
+                if (rows_overlap(self.section_rows[key1], self.section_rows[key2])
+                        or ((key1, key2) if key1 <= key2 else (key2, key1)) in self.too_close
+                        or not self._sections_compatible(*key1, *key2)):
+                    return False
+            if not all(self._sections_compatible(*key1, *other) for other in taken.items()):
+                return False
+        if len(keys) == 1:
+            return True  # Limits were checked per section
+        return rows_within_limits(taken_rows + [row for key in keys for row in self.section_rows[key]],
+                                  **self.hard_limits)
+
+    def _too_close_partners(self):
+        """Section key -> keys too close to it for the walk, rebuilt when the travel table changes"""
+        if self._too_close_index is None or self._too_close_index[0] is not self.too_close:
+            partners = defaultdict(set)
+            for key1, key2 in self.too_close:
+                partners[key1].add(key2)
+                partners[key2].add(key1)
+            self._too_close_index = (self.too_close, partners)
+        return self._too_close_index[1]
+
+    def _compile_search_space(self, course_options, group_picks=None):
+        """Compile prefiltered course options into the engine's conflict bitsets"""
+        return SearchSpace(course_options, self.section_rows, self._sections_compatible, group_picks, self.too_close,
+                           self.section_features)
+
+    def _sections_compatible(self, course1, section1, course2, section2):
+        """Pairing rule between two sections, as applied by _is_smart_pairing_valid"""
+        if self.course_pairs.get(course1) != course2:
+            return True
+        return self._are_sections_correctly_paired(course1, section1, course2, section2)
+
     def _prefilter_course_options(self):
         """
         Pre-filter course options for combination generation.
         Now uses course assignments instead of separate elective_categories.
         """
+        return self._prefilter_course_groups()[0]
+
+    def _prefilter_course_groups(self, selected_courses=None):
+        """
+        Pre-filter course options together with a label and a pick count per group.
+        Core courses pick one section; elective categories pick their required count of courses.
+        selected_courses overrides the current selection, e.g. to compile every catalog section.
+        Units are lists of (course_code, section) keys; meeting times come from section_rows.
+        """
+        if selected_courses is None:
+            selected_courses = self.selected_courses
         course_options = []
+        group_labels = []
+        group_picks = []
         processed_pairs = set()
 
         # 1. Process core courses (assigned to "core" or not assigned)
         core_courses = {}
-        for course_code, selected_sections in self.selected_courses.items():
+        for course_code, selected_sections in selected_courses.items():
             assignment = self.course_assignments.get(course_code, "core")
             if assignment == "core":
                 core_courses[course_code] = selected_sections
@@ -651,31 +1568,24 @@ class TimetableGenerator:
                 if section_key in processed_pairs:
                     continue
                 
-                section_data = self.course_data[
-                    (self.course_data['Course Code'] == course_code) & 
-                    (self.course_data['Section'] == section)
-                ]
-                
                 if self.is_section_paired(course_code, section):
-                    atomic_unit = [(course_code, section, section_data)]
+                    atomic_unit = [(course_code, section)]
                     paired_sections = self.get_paired_sections(course_code, section)
                     
                     for paired_course, paired_section in paired_sections:
-                        paired_data = self.course_data[
-                            (self.course_data['Course Code'] == paired_course) & 
-                            (self.course_data['Section'] == paired_section)
-                        ]
-                        atomic_unit.append((paired_course, paired_section, paired_data))
+                        atomic_unit.append((paired_course, paired_section))
                         processed_pairs.add((paired_course, paired_section))
                     
                     course_section_options.append(atomic_unit)
                     processed_pairs.add(section_key)
                 else:
-                    atomic_unit = [(course_code, section, section_data)]
+                    atomic_unit = [(course_code, section)]
                     course_section_options.append(atomic_unit)
             
             if course_section_options:
                 course_options.append(course_section_options)
+                group_labels.append(course_code)
+                group_picks.append(1)
 
         # 2. Process elective categories (courses assigned to category names)
         # Group courses by their assignments, treating paired courses as atomic units
@@ -683,7 +1593,7 @@ class TimetableGenerator:
         processed_elective_courses = set()
         
         for course_code, assignment in self.course_assignments.items():
-            if assignment != "core" and course_code in self.selected_courses and course_code not in processed_elective_courses:
+            if assignment != "core" and course_code in selected_courses and course_code not in processed_elective_courses:
                 if assignment not in elective_groups:
                     elective_groups[assignment] = []
                 
@@ -691,7 +1601,7 @@ class TimetableGenerator:
                 paired_courses = [course_code]
                 if course_code in self.course_pairs:
                     paired_course = self.course_pairs[course_code]
-                    if paired_course in self.selected_courses and self.course_assignments.get(paired_course) == assignment:
+                    if paired_course in selected_courses and self.course_assignments.get(paired_course) == assignment:
                         paired_courses.append(paired_course)
                         processed_elective_courses.add(paired_course)
                 
@@ -709,28 +1619,19 @@ class TimetableGenerator:
                 # Get all section combinations for this course group
                 group_section_options = []
                 for course_code in course_group:
-                    selected_sections = self.selected_courses.get(course_code, [])
+                    selected_sections = selected_courses.get(course_code, [])
                     course_section_list = []
                     
                     for section in selected_sections:
                         section_key = (course_code, section)
                         if section_key in processed_pairs:
                             continue
-                            
-                        section_data = self.course_data[
-                            (self.course_data['Course Code'] == course_code) & 
-                            (self.course_data['Section'] == section)
-                        ]
                         
-                        atomic_unit = [(course_code, section, section_data)]
+                        atomic_unit = [(course_code, section)]
                         if self.is_section_paired(course_code, section):
                             paired_sections = self.get_paired_sections(course_code, section)
                             for paired_course, paired_section in paired_sections:
-                                paired_data = self.course_data[
-                                    (self.course_data['Course Code'] == paired_course) & 
-                                    (self.course_data['Section'] == paired_section)
-                                ]
-                                atomic_unit.append((paired_course, paired_section, paired_data))
+                                atomic_unit.append((paired_course, paired_section))
                                 processed_pairs.add((paired_course, paired_section))
                         
                         course_section_list.append(atomic_unit)
@@ -752,8 +1653,10 @@ class TimetableGenerator:
             
             if category_choices:
                 course_options.append(category_choices)
+                group_labels.append(category_name)
+                group_picks.append(self.elective_requirements.get(category_name, 1))
         
-        return course_options
+        return course_options, group_labels, group_picks
 
     def _build_conflict_matrix(self):
         """Build a conflict matrix for O(1) conflict lookups"""
@@ -1101,67 +2004,50 @@ class TimetableGenerator:
         # If no training data exists, allow it (fallback to auto-prediction logic)
         return True
 
-    def format_combination(self, combination):
-        """Format a combination for display in the web interface"""
-        formatted_courses = []
-        schedule = {
-            'Monday': [],
-            'Tuesday': [],
-            'Wednesday': [],
-            'Thursday': [],
-            'Friday': [],
-            'Saturday': [],
-            'Sunday': []
+    def format_valid_combinations(self):
+        """Format every stored combination, folding in equivalent sections when results were collapsed"""
+        alternatives = self.combination_alternatives or [None] * len(self.valid_combinations)
+        return [self.format_combination(c, a) for c, a in zip(self.valid_combinations, alternatives)]
+
+    def compact_valid_combinations(self):
+        """Every stored combination as a list of section ids plus one shared table of the sections they use.
+        Clients rebuild the format_combination layout from section_wire entries (see expandTimetables)."""
+        used = sorted({section_id for combination in self.valid_combinations for section_id in combination})
+        payload = {
+            'days': DAY_NAMES,
+            'sections': {section_id: self.section_wire[section_id] for section_id in used},
+            'timetables': [list(combination) for combination in self.valid_combinations]
         }
-        
-        for course_code, section, course_data in combination:
-            # Get course title from the first row
-            title = course_data['Title'].iloc[0] if not course_data.empty else "Unknown Title"
-            instructor = course_data['Instructor / Sponsor'].iloc[0] if not course_data.empty else "Unknown Instructor"
-            
-            # Collect all time slots for this course section
-            time_slots = []
-            for _, row in course_data.iterrows():
-                day = row['Day']
-                start_time = row['Start']
-                end_time = row['End']
-                # Try multiple possible column names for location
-                location = row.get('Room', row.get('Location', 'TBA'))
-                
-                time_slots.append({
-                    'day': day,
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'location': location
-                })
-                
-                # Add to schedule organized by day
-                # Parse days (handle TTh, MW, etc.)
-                days_list = row.get('Days_List', [])
-                if not days_list:
-                    # Fallback to parsing the day string
-                    days_list = self._parse_days(day)
-                
-                for parsed_day in days_list:
-                    if parsed_day in schedule:
-                        schedule[parsed_day].append({
-                            'course': self.format_course_code_for_display(course_code),
-                            'section': section,
-                            'title': title,
-                            'instructor': instructor,
-                            'room': location,  # This will now use the correct location from above
-                            'start': start_time,
-                            'end': end_time,
-                            'time': f"{start_time} - {end_time}"
-                        })
-            
-            formatted_courses.append({
-                'course_code': self.format_course_code_for_display(course_code),
-                'section': section,
-                'title': title,
-                'instructor': instructor,
-                'time_slots': time_slots
-            })
+        if self.combination_alternatives:
+            # Equivalent sections keyed by the section id they relabel
+            payload['alternatives'] = [
+                {section_id: alternatives[self.section_keys[section_id][0]]
+                 for section_id in combination if self.section_keys[section_id][0] in alternatives}
+                for combination, alternatives in zip(self.valid_combinations, self.combination_alternatives)
+            ]
+        return payload
+
+    def _combination_ids(self, combination):
+        """Compact form of a (course_code, section, data) combination: a tuple of section ids"""
+        return tuple(self.section_ids[(course_code, section)] for course_code, section, _ in combination)
+
+    def format_combination(self, section_ids, alternatives=None):
+        """Format a combination of section ids for display in the web interface.
+        alternatives maps course codes to equivalent sections shown as "L1/L3/L5"."""
+        formatted_courses = []
+        schedule = {day: [] for day in DAY_NAMES}
+        
+        for section_id in section_ids:
+            course_entry, schedule_entries = self.section_fragments[section_id]
+            equivalent_sections = (alternatives or {}).get(self.section_keys[section_id][0])
+            if equivalent_sections:
+                # Collapsed results relabel the section, so these entries get their own copies
+                section = '/'.join(equivalent_sections)
+                course_entry = {**course_entry, 'section': section, 'equivalent_sections': equivalent_sections}
+                schedule_entries = [(day, {**entry, 'section': section}) for day, entry in schedule_entries]
+            formatted_courses.append(course_entry)
+            for day, entry in schedule_entries:
+                schedule[day].append(entry)
         
         return {
             'courses': formatted_courses,
@@ -1179,28 +2065,14 @@ class TimetableGenerator:
                 print(f"🔄 Loading embedded CSV: {csv_file_path}")
                 
                 # Read the CSV file
-                original_df = pd.read_csv(csv_file_path)
-                
-                # Process the data using the integrated processor
-                print("Running file processor to split courses with multiple section types...")
-                processed_df, split_courses = process_uploaded_file(original_df)
-                
-                # Use the processed data
-                self.course_data = processed_df
+                with open(csv_file_path, 'rb') as csv_file:
+                    file_content = csv_file.read()
+                self._load_catalog(file_content, lambda: pd.read_csv(io.BytesIO(file_content)))
                 self.current_file_path = csv_file_path
                 
-                # Clean and validate data
-                self._clean_data()
-                
                 # STEP 1 & 2: Auto-detect course pairs and section pairings
                 self.auto_detect_course_pairs()
                 
-                # Log processing results
-                if split_courses:
-                    print(f"File processing complete. {len(split_courses)} courses were split.")
-                else:
-                    print("File processing complete. No courses needed splitting.")
-                
                 print(f"✅ Successfully loaded {len(self.get_courses_with_titles())} courses from embedded CSV")
                 return True
             else:
@@ -1211,13 +2083,59 @@ class TimetableGenerator:
             print(f"❌ Error loading embedded CSV: {e}")
             return False
 
-    def create_elective_category(self, category_name: str):
+    def create_elective_category(self, category_name: str, required_count: int = 1):
         """Creates a new, empty elective category."""
         if category_name and category_name not in self.elective_categories:
+            if not isinstance(required_count, int) or isinstance(required_count, bool) or required_count < 1:
+                return False, "Required count must be a positive integer."
             self.elective_categories[category_name] = []
+            self.elective_requirements[category_name] = required_count
             return True, f"Category '{category_name}' created successfully."
         return False, f"Category '{category_name}' already exists or is invalid."
 
+    def set_elective_requirement(self, category_name: str, required_count: int):
+        """Sets how many courses must be taken from an elective category ("choose k of n")."""
+        if not category_name:
+            return False, "Category name is required."
+        if not isinstance(required_count, int) or isinstance(required_count, bool) or required_count < 1:
+            return False, "Required count must be a positive integer."
+        courses = set(self.elective_categories.get(category_name, []))
+        courses.update(code for code, assignment in self.course_assignments.items()
+                       if assignment == category_name and code in self.selected_courses)
+        if category_name not in self.elective_categories and not courses:
+            return False, f"Elective category '{category_name}' not found."
+        # A course and its paired course (BIO 101 + BIO 101L) are taken together and count once
+        choices = {min(code, self.course_pairs[code]) if self.course_pairs.get(code) in courses else code
+                   for code in courses}
+        if required_count > len(choices):
+            return False, (f"Category '{category_name}' has only {len(choices)} course(s) to choose from; "
+                           f"cannot require {required_count}.")
+        self.elective_requirements[category_name] = required_count
+        return True, f"Category '{category_name}' now requires {required_count} course(s)."
+
+    def count_feasible_elective_subsets(self, category_name: str, max_time_seconds=5, max_listed=100):
+        """Count the sets of courses from an elective category that fit into a full timetable"""
+        if not self.selected_courses:
+            return None
+        course_options, group_labels, group_picks, space = self._get_search_space()
+        if category_name not in group_labels:
+            return None
+        group_index = group_labels.index(category_name)
+        subsets, exact = space.count_member_subsets(
+            group_index, deadline=time_module.time() + max_time_seconds
+        )
+        return {
+            "category": category_name,
+            "required_count": group_picks[group_index],
+            "candidate_courses": len({unit[0][0] for unit in course_options[group_index]}),
+            "feasible_subsets": len(subsets),
+            "exact": exact,
+            "subsets": [
+                [self.format_course_code_for_display(code) for code in subset]
+                for subset in subsets[:max_listed]
+            ]
+        }
+
     def add_course_to_elective_category(self, category_name: str, course_code: str):
         """Adds a course to an elective category and removes it from main selection."""
         if category_name not in self.elective_categories:
@@ -1243,6 +2161,7 @@ class TimetableGenerator:
         if category_name in self.elective_categories:
             # Optional: move courses back to main selection, for now just delete
             del self.elective_categories[category_name]
+            self.elective_requirements.pop(category_name, None)
             return True, f"Category '{category_name}' deleted."
         return False, "Category not found."
 
@@ -1296,13 +2215,14 @@ async def timetable_viewer(request: Request):
     return templates.TemplateResponse("timetable_viewer.html", {"request": request})
 
 @app.get("/status")
-async def get_status(response: Response, session_id: str = Cookie(None)):
+async def get_status(session_id: str = Cookie(None)):
     session_id = get_session_id(session_id)
     generator = get_generator(session_id)
     status = {
         "data_loaded": generator.course_data is not None,
         "filename": generator.current_file_path,
-        "total_courses": 0,
+        "catalog_version": generator.catalog_version,
+        "total_courses": len(generator.catalog_courses),
         "selected_courses": generator.selected_courses,
         "has_combinations": len(generator.valid_combinations) > 0,
         "smart_features": {
@@ -1313,12 +2233,31 @@ async def get_status(response: Response, session_id: str = Cookie(None)):
             "elective_courses": sum(len(courses) for courses in generator.elective_categories.values())
         }
     }
-    if generator.course_data is not None:
-        courses = generator.get_courses_with_titles()
-        status["total_courses"] = len(courses)
-        status["courses"] = courses
-    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
-    return status
+    return json_response(session_id, status)
+
+@app.get("/sessions/metrics")
+async def get_session_metrics():
+    """Session store size against its limits, with eviction counts since startup"""
+    return session_store.stats()
+
+@app.get("/catalog")
+async def get_catalog(request: Request, v: str = None, session_id: str = Cookie(None)):
+    """Course list of the loaded catalog. Clients fetch /catalog?v=<catalog_version> from /status,
+    so a versioned URL never changes and may be cached for good."""
+    session_id = get_session_id(session_id)
+    generator = get_generator(session_id)
+    if generator.course_data is None:
+        raise HTTPException(status_code=404, detail="No course data loaded")
+    if v is not None and v == generator.catalog_version:
+        cache_control = "private, max-age=31536000, immutable"
+    else:
+        cache_control = "private, no-cache"
+    result = cached_body_response(
+        request, generator.catalog_payloads, "catalog",
+        lambda: {"version": generator.catalog_version, "courses": generator.catalog_courses}, cache_control
+    )
+    result.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    return result
 
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
@@ -1382,13 +2321,135 @@ async def get_courses(response: Response, session_id: str = Cookie(None)):
     return {"selected_courses": generator.selected_courses}
 
 @app.post("/generate")
-async def generate_timetable(request: Request, response: Response, session_id: str = Cookie(None)):
+async def generate_timetable(request: Request, session_id: str = Cookie(None)):
     session_id = get_session_id(session_id)
     generator = get_generator(session_id)
-    # Optionally update selected_courses here if needed
-    generator.valid_combinations = generator.generate_combinations_smart_limit()
+    # Body is optional: the UI posts without one
+    data = await optional_json_object(request)
+    strategy = data.get("strategy")
+    if strategy is not None and strategy not in STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"Unknown strategy '{strategy}'. Use one of: {', '.join(STRATEGIES)}")
+    result_format = data.get("format", "full")
+    check_result_format(result_format)
+    preferences = data.get("preferences")
+    if preferences is not None and not isinstance(preferences, dict):
+        raise HTTPException(status_code=400, detail="preferences must be an object of preference flags")
+    unknown = sorted(set(preferences or ()) - set(PREFERENCES))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown preference(s): {', '.join(unknown)}. Use any of: {', '.join(PREFERENCES)}")
+    seed = data.get("seed")
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+        raise HTTPException(status_code=400, detail=f"seed must be a whole number, not {seed!r}")
+    # Blocked windows and hard limits stay active for later requests until replaced
+    if "blocked_times" in data:
+        success, message = generator.set_time_blocks(data["blocked_times"])
+        if not success:
+            raise HTTPException(status_code=400, detail=message)
+    if "limits" in data:
+        success, message = generator.set_hard_limits(data["limits"])
+        if not success:
+            raise HTTPException(status_code=400, detail=message)
+    generator.valid_combinations = generator.generate_combinations_smart_limit(
+        preferences=preferences,
+        strategy=strategy,
+        collapse_equivalent=bool(data.get("collapse_equivalent", False)),
+        seed=seed
+    )
+    return json_response(session_id, {
+        "success": True,
+        "count": len(generator.valid_combinations),
+        "result_version": generator.result_version,
+        "plan": generator.last_plan,
+        "conflict_core": generator.last_conflict_core,
+        "repair_suggestions": generator.last_repairs,
+        **timetables_payload(generator, result_format)
+    })
+
+@app.post("/feasible-options")
+async def get_feasible_options(request: Request, response: Response, session_id: str = Cookie(None)):
+    """Catalog sections of the selected courses (and any listed courses) that still fit into at least
+    one valid timetable, given the sections locked so far"""
+    session_id = get_session_id(session_id)
+    generator = get_generator(session_id)
+    data = await optional_json_object(request)
+    locked = data.get("locked") or {}
+    courses = data.get("courses") or []
+    if not isinstance(locked, dict) or not all(isinstance(sections, list) for sections in locked.values()):
+        raise HTTPException(status_code=400, detail="locked must map course codes to lists of sections")
+    if not isinstance(courses, list) or not all(isinstance(course_code, str) for course_code in courses):
+        raise HTTPException(status_code=400, detail="courses must be a list of course codes")
+    start_time = time_module.time()
+    result = generator.feasible_options(locked, courses)
+    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    return {"success": True, **result, "elapsed_ms": round((time_module.time() - start_time) * 1000, 2)}
+
+@app.post("/repair-suggestions")
+async def get_repair_suggestions(request: Request, response: Response, session_id: str = Cookie(None)):
+    """Smallest changes to the selection that make a valid timetable possible"""
+    session_id = get_session_id(session_id)
+    generator = get_generator(session_id)
+    data = await optional_json_object(request)
+    max_edits = bounded_int(data, "max_edits", 2, MAX_REPAIR_EDITS)
+    max_suggestions = bounded_int(data, "max_suggestions", 10, MAX_REPAIR_SUGGESTIONS)
+    start_time = time_module.time()
+    result = generator.repair_suggestions(max_edits=max_edits, max_suggestions=max_suggestions)
     response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
-    return {"success": True, "count": len(generator.valid_combinations), "timetables": [generator.format_combination(c) for c in generator.valid_combinations]}
+    return {"success": True, **result, "elapsed_ms": round((time_module.time() - start_time) * 1000, 2)}
+
+@app.get("/timetables/{index}/neighbors")
+async def get_timetable_neighbors(index: int, response: Response, session_id: str = Cookie(None)):
+    """Timetables that differ from a generated one by a single section"""
+    session_id = get_session_id(session_id)
+    generator = get_generator(session_id)
+    start_time = time_module.time()
+    neighbors = generator.timetable_neighbors(index)
+    if neighbors is None:
+        raise HTTPException(status_code=404, detail="Timetable not found. Generate timetables first.")
+    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    return {
+        "success": True,
+        "count": len(neighbors),
+        "neighbors": neighbors,
+        "elapsed_ms": round((time_module.time() - start_time) * 1000, 2)
+    }
+
+@app.get("/timetables/{index}/fill-gaps")
+async def get_fill_gaps(index: int, response: Response, session_id: str = Cookie(None)):
+    """Catalog courses that fit into the free time of a generated timetable"""
+    session_id = get_session_id(session_id)
+    generator = get_generator(session_id)
+    start_time = time_module.time()
+    courses = generator.fill_gaps(index)
+    if courses is None:
+        raise HTTPException(status_code=404, detail="Timetable not found. Generate timetables first.")
+    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    return {
+        "success": True,
+        "count": len(courses),
+        "courses": courses,
+        "elapsed_ms": round((time_module.time() - start_time) * 1000, 2)
+    }
+
+@app.post("/upload-travel-times")
+async def upload_travel_times(response: Response, file: UploadFile = File(...), session_id: str = Cookie(None)):
+    """Upload a building distance CSV so back-to-back classes across campus count as conflicts"""
+    session_id = get_session_id(session_id)
+    generator = get_generator(session_id)
+    if not file.filename.lower().endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Only CSV files are supported for travel times")
+    success, message = generator.load_travel_times(await file.read())
+    if not success:
+        raise HTTPException(status_code=400, detail=message)
+    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    return {"success": True, "message": message, "too_close_pairs": len(generator.too_close)}
+
+@app.post("/clear-travel-times")
+async def clear_travel_times(response: Response, session_id: str = Cookie(None)):
+    session_id = get_session_id(session_id)
+    generator = get_generator(session_id)
+    generator.clear_travel_times()
+    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    return {"success": True, "message": "Travel times cleared."}
 
 @app.post("/clear_data")
 async def clear_data(response: Response, session_id: str = Cookie(None)):
@@ -1407,11 +2468,12 @@ async def clear_roster(response: Response, session_id: str = Cookie(None)):
     return {"message": "Roster cleared"}
 
 @app.get("/get_timetables")
-async def get_timetables(response: Response, session_id: str = Cookie(None)):
+async def get_timetables(request: Request, format: str = "full", session_id: str = Cookie(None)):
+    check_result_format(format)
     session_id = get_session_id(session_id)
     generator = get_generator(session_id)
-    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
-    return {"timetables": [generator.format_combination(c) for c in generator.valid_combinations]}
+    return cached_results_response(request, generator, session_id, f"get_timetables:{format}",
+                                   lambda: timetables_payload(generator, format))
 
 @app.post("/select-sections")
 async def select_sections(request: Request, response: Response, session_id: str = Cookie(None)):
@@ -1533,6 +2595,48 @@ async def validate_selection(request: Request, response: Response, session_id: s
     response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
     return {"success": True, "message": "Selection validated"}
     
+@app.get("/courses/search")
+async def search_courses(response: Response, q: str = "", offset: int = 0, limit: int = SEARCH_PAGE_SIZE,
+                         session_id: str = Cookie(None)):
+    """Courses matching a code prefix or title/instructor words, best first, one page at a time"""
+    session_id = get_session_id(session_id)
+    generator = get_generator(session_id)
+    start_time = time_module.time()
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), SEARCH_MAX_PAGE_SIZE)
+    total, courses = generator.search_courses(q, offset, limit)
+    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    return {
+        "query": q,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "courses": courses,
+        "elapsed_ms": round((time_module.time() - start_time) * 1000, 3)
+    }
+
+@app.get("/sections/query")
+async def query_sections(response: Response, days: str = None, start: str = None, end: str = None,
+                         instructor: str = None, room: str = None, mode: str = "meets", offset: int = 0,
+                         limit: int = QUERY_PAGE_SIZE, session_id: str = Cookie(None)):
+    """Sections meeting in a time window on some weekdays (e.g. days=T&start=3:00 PM),
+    or fitting entirely into a gap with mode=fits (e.g. days=MW&start=10:00 AM&end=12:00 PM)"""
+    session_id = get_session_id(session_id)
+    generator = get_generator(session_id)
+    start_time = time_module.time()
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), QUERY_MAX_PAGE_SIZE)
+    result, message = generator.query_sections(days, start, end, instructor, room, mode, offset, limit)
+    if result is None:
+        raise HTTPException(status_code=400, detail=message)
+    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    return {
+        **result,
+        "offset": offset,
+        "limit": limit,
+        "elapsed_ms": round((time_module.time() - start_time) * 1000, 3)
+    }
+
 @app.get("/courses/{course_code}/sections")
 async def get_course_sections(course_code: str, response: Response, session_id: str = Cookie(None)):
     session_id = get_session_id(session_id)
@@ -1542,20 +2646,24 @@ async def get_course_sections(course_code: str, response: Response, session_id:
     return {"sections": sections}
     
 @app.get("/get-results")
-async def get_results(response: Response, session_id: str = Cookie(None)):
+async def get_results(request: Request, format: str = "full", session_id: str = Cookie(None)):
     """Get existing timetable results without regenerating"""
+    check_result_format(format)
     session_id = get_session_id(session_id)
     generator = get_generator(session_id)
-    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
     
-    if generator.valid_combinations:
+    def build_payload():
+        if not generator.valid_combinations:
+            return {"success": False, "count": 0, "timetables": []}
         return {
             "success": True, 
             "count": len(generator.valid_combinations), 
-            "timetables": [generator.format_combination(c) for c in generator.valid_combinations]
+            "result_version": generator.result_version,
+            "plan": generator.last_plan,
+            **timetables_payload(generator, format)
         }
-    else:
-        return {"success": False, "count": 0, "timetables": []}
+    
+    return cached_results_response(request, generator, session_id, f"get-results:{format}", build_payload)
     
 @app.post("/electives/create-category")
 async def create_elective_category_endpoint(request: Request, response: Response, session_id: str = Cookie(None)):
@@ -1563,10 +2671,33 @@ async def create_elective_category_endpoint(request: Request, response: Response
     generator = get_generator(session_id)
     data = await request.json()
     category_name = data.get("category_name")
-    success, message = generator.create_elective_category(category_name)
+    required_count = data.get("required_count", 1)
+    success, message = generator.create_elective_category(category_name, required_count)
     response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
     return {"success": success, "message": message, "categories": generator.elective_categories}
 
+@app.post("/electives/set-required-count")
+async def set_elective_required_count_endpoint(request: Request, response: Response, session_id: str = Cookie(None)):
+    session_id = get_session_id(session_id)
+    generator = get_generator(session_id)
+    data = await request.json()
+    category_name = data.get("category_name")
+    required_count = data.get("required_count")
+    success, message = generator.set_elective_requirement(category_name, required_count)
+    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    return {"success": success, "message": message, "required_counts": generator.elective_requirements}
+
+@app.get("/electives/feasible-subsets")
+async def get_feasible_elective_subsets_endpoint(category_name: str, response: Response, session_id: str = Cookie(None)):
+    """How many k-course subsets of an elective category can be scheduled with the rest of the selection"""
+    session_id = get_session_id(session_id)
+    generator = get_generator(session_id)
+    result = generator.count_feasible_elective_subsets(category_name)
+    response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
+    if result is None:
+        return {"success": False, "message": f"No selected courses are assigned to '{category_name}'"}
+    return {"success": True, **result}
+
 @app.post("/electives/add-course")
 async def add_course_to_category_endpoint(request: Request, response: Response, session_id: str = Cookie(None)):
     session_id = get_session_id(session_id)
@@ -1604,7 +2735,11 @@ async def get_elective_categories_endpoint(response: Response, session_id: str =
     session_id = get_session_id(session_id)
     generator = get_generator(session_id)
     response.set_cookie(key=SESSION_COOKIE, value=session_id, httponly=True)
-    return {"success": True, "categories": generator.elective_categories}
+    return {
+        "success": True,
+        "categories": generator.elective_categories,
+        "required_counts": generator.elective_requirements
+    }
 
 @app.post("/electives/assign-course")
 async def assign_course_to_category_endpoint(request: Request, response: Response, session_id: str = Cookie(None)):